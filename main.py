@@ -1,33 +1,27 @@
-import os
 import time
+startup_start = time.perf_counter()
+import os
+import queue
 import threading
 import configparser
-from datetime import timedelta
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
-import numpy as np
-from musicnn.extractor import extractor
-from mutagen.easyid3 import EasyID3
-from mutagen.mp3 import MP3
-from openpyxl import Workbook
-from scipy.stats import logser
+import tagger_browser
+import tagger_cache
+import tagger_core
+import tagger_engine
+import tagger_features
+import tagger_id3
+import tagger_journal
+import tagger_rename
+import tagger_scan
+import tagger_store
+from tagger_core import SONGS_DIR, RESULTS_DIR, DATA_DIR
+imports_done = time.perf_counter()
 
 # This Ignores the CUDA Error , Could not load dynamic library 'cudart64_110.dll' due to lack of gpu
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
 
-# ========================
-# Directory Setup
-# ========================
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SONGS_DIR = os.path.join(BASE_DIR, "songs")
-RESULTS_DIR = os.path.join(BASE_DIR, "results")
-LOGS_DIR = os.path.join(BASE_DIR, "logs")
-DATA_DIR = os.path.join(BASE_DIR, "data")
-
-# Ensure directories exist, Create folders if they don't exist
-for folder in [SONGS_DIR, RESULTS_DIR,LOGS_DIR, DATA_DIR]:
-    os.makedirs(folder, exist_ok=True)
-
 CONFIG_FILE = os.path.join(DATA_DIR, "tagger_config.ini")
 config = configparser.ConfigParser()
 
@@ -98,6 +92,38 @@ mode_var = tk.StringVar(value="Pick a tagging mode...")
 use_custom_output = tk.BooleanVar(value=False)
 custom_output_folder = tk.StringVar(value=RESULTS_DIR)
 var_top_tags_only = tk.BooleanVar(value=False)
+batch_size_var = tk.StringVar(value=str(tagger_engine.DEFAULT_BATCH_SIZE))
+workers_var = tk.StringVar(value="1")
+decode_depth_var = tk.StringVar(value=str(tagger_engine.DEFAULT_DECODE_DEPTH))
+write_depth_var = tk.StringVar(value=str(tagger_engine.DEFAULT_WRITE_DEPTH))
+bypass_cache_var = tk.BooleanVar(value=False)
+cache_max_mb_var = tk.StringVar(value=str(tagger_cache.DEFAULT_MAX_MB))
+model_vars = {name: tk.BooleanVar(value=name == tagger_engine.DEFAULT_MODEL) for name in tagger_engine.MODELS}
+ensemble_merge_var = tk.StringVar(value="merge")
+feature_cache_var = tk.BooleanVar(value=False)
+feature_cache_max_mb_var = tk.StringVar(value=str(tagger_features.DEFAULT_MAX_MB))
+early_exit_var = tk.BooleanVar(value=False)
+early_exit_patience_var = tk.StringVar(value=str(tagger_engine.DEFAULT_EARLY_EXIT_PATIENCE))
+sample_mode_var = tk.StringVar(value="off")
+sample_value_var = tk.StringVar(value=str(tagger_engine.DEFAULT_SAMPLE_COUNT))
+sample_placement_var = tk.StringVar(value="spread")
+scan_recursive_var = tk.BooleanVar(value=False)
+scan_include_var = tk.StringVar(value=", ".join(tagger_scan.DEFAULT_INCLUDE))
+scan_exclude_var = tk.StringVar(value="")
+scan_max_depth_var = tk.StringVar(value="")
+export_csv_var = tk.BooleanVar(value=False)
+export_jsonl_var = tk.BooleanVar(value=False)
+store_scores_var = tk.BooleanVar(value=True)
+store_taggrams_var = tk.BooleanVar(value=False)
+trace_var = tk.BooleanVar(value=True)
+chrome_trace_var = tk.BooleanVar(value=False)
+incremental_var = tk.BooleanVar(value=False)
+watch_var = tk.BooleanVar(value=False)
+watch_interval_var = tk.StringVar(value="10")
+WATCH_DEFAULT_MINUTES = 10
+WATCH_SETTLE_SECONDS = 30  # files newer than this may still be copying in
+tagging_thread = None
+watch_job = None
 
 def update_gui_visibility(*args):
     """Enable or disable Excel folder options based on current mode and checkbox."""
@@ -107,6 +133,8 @@ def update_gui_visibility(*args):
     # Enable/disable custom output folder checkbox and entry
     state = "normal" if allow_excel and use_custom_output.get() else "disabled"
     custom_checkbox.config(state="normal" if allow_excel else "disabled")
+    export_csv_checkbox.config(state="normal" if allow_excel else "disabled")
+    export_jsonl_checkbox.config(state="normal" if allow_excel else "disabled")
     custom_output_entry.config(state=state)
     browse_button.config(state=state)
 
@@ -127,6 +155,35 @@ def trace_all():
     overlap_var.trace_add("write", lambda *args: save_config())
     use_custom_output.trace_add("write", lambda *args: save_config())
     custom_output_folder.trace_add("write", lambda *args: save_config())
+    batch_size_var.trace_add("write", lambda *args: save_config())
+    workers_var.trace_add("write", lambda *args: save_config())
+    decode_depth_var.trace_add("write", lambda *args: save_config())
+    write_depth_var.trace_add("write", lambda *args: save_config())
+    bypass_cache_var.trace_add("write", lambda *args: save_config())
+    cache_max_mb_var.trace_add("write", lambda *args: save_config())
+    feature_cache_var.trace_add("write", lambda *args: save_config())
+    for var in model_vars.values():
+        var.trace_add("write", lambda *args: save_config())
+    ensemble_merge_var.trace_add("write", lambda *args: save_config())
+    feature_cache_max_mb_var.trace_add("write", lambda *args: save_config())
+    early_exit_var.trace_add("write", lambda *args: save_config())
+    early_exit_patience_var.trace_add("write", lambda *args: save_config())
+    sample_mode_var.trace_add("write", lambda *args: save_config())
+    sample_value_var.trace_add("write", lambda *args: save_config())
+    sample_placement_var.trace_add("write", lambda *args: save_config())
+    scan_recursive_var.trace_add("write", lambda *args: save_config())
+    scan_include_var.trace_add("write", lambda *args: save_config())
+    scan_exclude_var.trace_add("write", lambda *args: save_config())
+    scan_max_depth_var.trace_add("write", lambda *args: save_config())
+    export_csv_var.trace_add("write", lambda *args: save_config())
+    export_jsonl_var.trace_add("write", lambda *args: save_config())
+    store_scores_var.trace_add("write", lambda *args: save_config())
+    store_taggrams_var.trace_add("write", lambda *args: save_config())
+    trace_var.trace_add("write", lambda *args: save_config())
+    chrome_trace_var.trace_add("write", lambda *args: save_config())
+    incremental_var.trace_add("write", lambda *args: save_config())
+    watch_var.trace_add("write", lambda *args: save_config())
+    watch_interval_var.trace_add("write", lambda *args: save_config())
 
 # ========================
 # Theme Application
@@ -167,7 +224,7 @@ def apply_theme():
 
     for button in button_frame.winfo_children():
         try:
-            button.configure(bg="#4CAF50" if "Start" in button.cget("text") else "#f44336", fg="white")
+            button.configure(bg="#f44336" if "Stop" in button.cget("text") else "#4CAF50", fg="white")
         except:
             pass
 
@@ -185,6 +242,36 @@ def load_config():
         custom_output_folder.set(settings.get("excel_output_folder", RESULTS_DIR))
         duration_var.set(settings.get("duration", "3"))
         overlap_var.set(int(settings.get("overlap", "50")))
+        batch_size_var.set(settings.get("batch_size", str(tagger_engine.DEFAULT_BATCH_SIZE)))
+        workers_var.set(settings.get("workers", "1"))
+        decode_depth_var.set(settings.get("decode_queue_depth", str(tagger_engine.DEFAULT_DECODE_DEPTH)))
+        write_depth_var.set(settings.get("write_queue_depth", str(tagger_engine.DEFAULT_WRITE_DEPTH)))
+        bypass_cache_var.set(settings.getboolean("bypass_cache", False))
+        cache_max_mb_var.set(settings.get("cache_max_mb", str(tagger_cache.DEFAULT_MAX_MB)))
+        feature_cache_var.set(settings.getboolean("feature_cache", False))
+        chosen = settings.get("models", tagger_engine.DEFAULT_MODEL).split(",")
+        for name, var in model_vars.items():
+            var.set(name in chosen)
+        ensemble_merge_var.set(settings.get("ensemble_merge", "merge"))
+        feature_cache_max_mb_var.set(settings.get("feature_cache_max_mb", str(tagger_features.DEFAULT_MAX_MB)))
+        early_exit_var.set(settings.getboolean("early_exit", False))
+        early_exit_patience_var.set(settings.get("early_exit_patience", str(tagger_engine.DEFAULT_EARLY_EXIT_PATIENCE)))
+        sample_mode_var.set(settings.get("sample_mode", "off"))
+        sample_value_var.set(settings.get("sample_value", str(tagger_engine.DEFAULT_SAMPLE_COUNT)))
+        sample_placement_var.set(settings.get("sample_placement", "spread"))
+        scan_recursive_var.set(settings.getboolean("scan_recursive", False))
+        scan_include_var.set(settings.get("scan_include", ", ".join(tagger_scan.DEFAULT_INCLUDE)))
+        scan_exclude_var.set(settings.get("scan_exclude", ""))
+        scan_max_depth_var.set(settings.get("scan_max_depth", ""))
+        export_csv_var.set(settings.getboolean("export_csv", False))
+        export_jsonl_var.set(settings.getboolean("export_jsonl", False))
+        store_scores_var.set(settings.getboolean("store_scores", True))
+        store_taggrams_var.set(settings.getboolean("store_taggrams", False))
+        trace_var.set(settings.getboolean("trace", True))
+        chrome_trace_var.set(settings.getboolean("chrome_trace", False))
+        incremental_var.set(settings.getboolean("incremental", False))
+        watch_var.set(settings.getboolean("watch_folder", False))
+        watch_interval_var.set(settings.get("watch_interval_minutes", str(WATCH_DEFAULT_MINUTES)))
         global dark_mode
         dark_mode = settings.getboolean("dark_mode", False)
         apply_theme()
@@ -198,6 +285,34 @@ def save_config():
         "excel_output_folder": custom_output_folder.get(),
         "duration": duration_var.get(),
         "overlap": str(overlap_var.get()),
+        "batch_size": batch_size_var.get(),
+        "workers": workers_var.get(),
+        "decode_queue_depth": decode_depth_var.get(),
+        "write_queue_depth": write_depth_var.get(),
+        "bypass_cache": str(bypass_cache_var.get()),
+        "cache_max_mb": cache_max_mb_var.get(),
+        "feature_cache": str(feature_cache_var.get()),
+        "models": ",".join(selected_models()),
+        "ensemble_merge": ensemble_merge_var.get(),
+        "feature_cache_max_mb": feature_cache_max_mb_var.get(),
+        "early_exit": str(early_exit_var.get()),
+        "early_exit_patience": early_exit_patience_var.get(),
+        "sample_mode": sample_mode_var.get(),
+        "sample_value": sample_value_var.get(),
+        "sample_placement": sample_placement_var.get(),
+        "scan_recursive": str(scan_recursive_var.get()),
+        "scan_include": scan_include_var.get(),
+        "scan_exclude": scan_exclude_var.get(),
+        "scan_max_depth": scan_max_depth_var.get(),
+        "export_csv": str(export_csv_var.get()),
+        "export_jsonl": str(export_jsonl_var.get()),
+        "store_scores": str(store_scores_var.get()),
+        "store_taggrams": str(store_taggrams_var.get()),
+        "trace": str(trace_var.get()),
+        "chrome_trace": str(chrome_trace_var.get()),
+        "incremental": str(incremental_var.get()),
+        "watch_folder": str(watch_var.get()),
+        "watch_interval_minutes": watch_interval_var.get(),
         "dark_mode": str(dark_mode)
     }
     with open(CONFIG_FILE, "w") as configfile:
@@ -222,24 +337,72 @@ def reset_to_defaults():
         use_custom_output.set(False)
         custom_output_folder.set(RESULTS_DIR)
         var_top_tags_only.set(False)
+        batch_size_var.set(str(tagger_engine.DEFAULT_BATCH_SIZE))
+        workers_var.set("1")
+        decode_depth_var.set(str(tagger_engine.DEFAULT_DECODE_DEPTH))
+        write_depth_var.set(str(tagger_engine.DEFAULT_WRITE_DEPTH))
+        bypass_cache_var.set(False)
+        cache_max_mb_var.set(str(tagger_cache.DEFAULT_MAX_MB))
+        feature_cache_var.set(False)
+        for name, var in model_vars.items():
+            var.set(name == tagger_engine.DEFAULT_MODEL)
+        ensemble_merge_var.set("merge")
+        feature_cache_max_mb_var.set(str(tagger_features.DEFAULT_MAX_MB))
+        early_exit_var.set(False)
+        early_exit_patience_var.set(str(tagger_engine.DEFAULT_EARLY_EXIT_PATIENCE))
+        sample_mode_var.set("off")
+        sample_value_var.set(str(tagger_engine.DEFAULT_SAMPLE_COUNT))
+        sample_placement_var.set("spread")
+        scan_recursive_var.set(False)
+        scan_include_var.set(", ".join(tagger_scan.DEFAULT_INCLUDE))
+        scan_exclude_var.set("")
+        scan_max_depth_var.set("")
+        export_csv_var.set(False)
+        export_jsonl_var.set(False)
+        store_scores_var.set(True)
+        store_taggrams_var.set(False)
+        trace_var.set(True)
+        chrome_trace_var.set(False)
+        incremental_var.set(False)
+        watch_var.set(False)
+        watch_interval_var.set(str(WATCH_DEFAULT_MINUTES))
         global dark_mode
         dark_mode = False
         apply_theme()
         save_config()
 
-settings_label = tk.Label(tab_settings, text="Settings", font=("Helvetica", 16, "bold"))
-settings_label.pack(pady=10)
-tk.Button(tab_settings, text="🌓 Toggle Dark Mode", command=toggle_dark_mode).pack(pady=5)
-tk.Button(tab_settings, text="🔄 Reset to Defaults", command=reset_to_defaults).pack(pady=5)
-
-# Build shared header in each tab
+def build_settings_tab():
+    build_header(tab_settings, "Settings")
+    settings_label = tk.Label(tab_settings, text="Settings", font=("Helvetica", 16, "bold"))
+    settings_label.pack(pady=10)
+    tk.Button(tab_settings, text="🌓 Toggle Dark Mode", command=toggle_dark_mode).pack(pady=5)
+    tk.Button(tab_settings, text="🔄 Reset to Defaults", command=reset_to_defaults).pack(pady=5)
+
+    # Library scanning, shared by every tab that works on a folder
+    scan_frame = tk.LabelFrame(tab_settings, text="🔎 Library Scanning", padx=10, pady=10)
+    scan_frame.pack(padx=20, pady=10, fill="x")
+    tk.Checkbutton(scan_frame, text="Include subfolders (artist/album trees)",
+                   variable=scan_recursive_var).grid(row=0, column=0, columnspan=2, sticky="w")
+    tk.Label(scan_frame, text="Max subfolder depth (blank = no limit):").grid(row=1, column=0, sticky="w")
+    tk.Entry(scan_frame, textvariable=scan_max_depth_var, width=5).grid(row=1, column=1, sticky="w", padx=5)
+    tk.Label(scan_frame, text="Include patterns:").grid(row=2, column=0, sticky="w")
+    tk.Entry(scan_frame, textvariable=scan_include_var, width=40).grid(row=2, column=1, sticky="w", padx=5)
+    tk.Label(scan_frame, text="Exclude patterns:").grid(row=3, column=0, sticky="w")
+    tk.Entry(scan_frame, textvariable=scan_exclude_var, width=40).grid(row=3, column=1, sticky="w", padx=5)
+
+def scan_options():
+    """Scanner settings from the Settings tab, as keyword arguments for LibraryScanner."""
+    depth = scan_max_depth_var.get().strip()
+    return dict(recursive=scan_recursive_var.get(),
+                include=tagger_scan.split_patterns(scan_include_var.get()) or tagger_scan.DEFAULT_INCLUDE,
+                exclude=tagger_scan.split_patterns(scan_exclude_var.get()),
+                max_depth=int(depth) if depth.isdigit() else None)
+
+def make_scanner(folder):
+    return tagger_scan.LibraryScanner(folder, **scan_options())
+
+# Only the Genre Tagger is built up front; the other tabs build when first opened
 build_header(tab_genre, "Genre Tagger")
-build_header(tab_renamer, "Batch Renamer")
-build_header(tab_metadata, "Metadata Editor")
-build_header(tab_browser, "Song Browser")
-build_header(tab_help, "Help")
-build_header(tab_about, "About")
-build_header(tab_settings, "Settings")
 
 # ========================
 # Song Browser Layout
@@ -247,7 +410,15 @@ build_header(tab_settings, "Settings")
 browser_folder_var = tk.StringVar()
 song_list_var = tk.StringVar(value=[])
 selected_song_var = tk.StringVar()
+browser_count_var = tk.StringVar()
+browser_scan_id = 0
+song_listbox = None
 metadata_display = None
+similar_listbox = None
+metadata_cache = tagger_browser.MetadataCache()
+similarity_index = None
+similar_paths = []
+SIMILAR_COUNT = 10
 
 def browse_song_folder():
     folder = filedialog.askdirectory(title="Choose Folder to Browse Songs")
@@ -256,67 +427,150 @@ def browse_song_folder():
         load_songs_from_folder(folder)
 
 def load_songs_from_folder(folder):
-    songs = [f for f in os.listdir(folder) if f.lower().endswith(".mp3")]
-    song_listbox.delete(0, tk.END)
-    for song in songs:
-        song_listbox.insert(tk.END, song)
+    """Fill the song list from a background scan, a few hundred names at a time."""
+    global browser_scan_id
+    browser_scan_id += 1
+    scan_id = browser_scan_id
+    scanner = make_scanner(folder)
+
+    def scan_worker():
+        batch = []
+        last_flush = time.time()
+        for song in scanner:
+            if scan_id != browser_scan_id:
+                return  # another folder was picked meanwhile
+            batch.append(song)
+            if len(batch) >= 500 or time.time() - last_flush > 0.2:
+                post_call(add_songs, scan_id, batch, scanner.count, False)
+                batch = []
+                last_flush = time.time()
+        post_call(add_songs, scan_id, batch, scanner.count, True)
+
+    song_listbox.clear()
+    browser_count_var.set("🔎 Scanning...")
+    threading.Thread(target=scan_worker, daemon=True).start()
     selected_song_var.set("")
     metadata_display.config(state="normal")
     metadata_display.delete("1.0", tk.END)
     metadata_display.insert(tk.END, "Select a song to view metadata.\n")
     metadata_display.config(state="disabled")
 
-def show_song_metadata(event=None):
-    selected = song_listbox.curselection()
-    if not selected:
+def add_songs(scan_id, songs, count, done):
+    """Append one batch of scanned songs to the list (Tk thread)."""
+    if scan_id != browser_scan_id:
         return
-    index = selected[0]
-    song_name = song_listbox.get(index)
-    song_path = os.path.join(browser_folder_var.get(), song_name)
-
-    try:
-        audio = MP3(song_path, ID3=EasyID3)
+    if songs:
+        song_listbox.extend(songs)
+    browser_count_var.set(f"{count} songs" if done else f"🔎 {count} songs found, still scanning...")
+
+def song_path_at(index):
+    return os.path.join(browser_folder_var.get(), song_listbox.get(index))
+
+def show_song_metadata(index):
+    """Show the selected song's tags: from the cache right away, then re-checked in the background."""
+    song_path = song_path_at(index)
+    selected_song_var.set(song_path)
+    cached = metadata_cache.peek(song_path)
+    display_metadata(song_path, cached if cached is not None else "⏳ Reading metadata...")
+    metadata_cache.request(song_path, lambda path, metadata: post_call(display_metadata, path, metadata))
+
+    # Read ahead around the selection so the next arrow-key press is instant
+    first = max(0, index - tagger_browser.PREFETCH_RADIUS)
+    last = min(len(song_listbox.items), index + tagger_browser.PREFETCH_RADIUS + 1)
+    metadata_cache.prefetch([song_path_at(i) for i in range(first, last) if i != index])
+    show_similar_tracks(song_path)
+
+def display_metadata(song_path, metadata):
+    """Fill the metadata panel, unless the selection has moved on to another song (Tk thread)."""
+    if song_path != selected_song_var.get():
+        return
+    song_name = os.path.relpath(song_path, browser_folder_var.get())
+    if isinstance(metadata, str):
+        lines = [f"🎵 File: {song_name}", metadata]
+    elif isinstance(metadata, Exception):
+        lines = [f"❌ Error reading metadata: {metadata}"]
+    else:
         lines = [
             f"🎵 File: {song_name}",
-            f"🎤 Artist: {audio.get('artist', [''])[0]}",
-            f"👤 Album Artist: {audio.get('albumartist', [''])[0]}",
-            f"💿 Album: {audio.get('album', [''])[0]}",
-            f"📅 Year: {audio.get('date', [''])[0]}",
-            f"🏢 Publisher: {audio.get('organization', [''])[0]}",
-            f"© Copyright: {audio.get('copyright', [''])[0]}",
-            f"🎧 Genre: {audio.get('genre', [''])[0]}",
-            f"⏱ Length: {int(audio.info.length)} seconds"
+            f"🎤 Artist: {metadata['artist']}",
+            f"👤 Album Artist: {metadata['albumartist']}",
+            f"💿 Album: {metadata['album']}",
+            f"📅 Year: {metadata['date']}",
+            f"🏢 Publisher: {metadata['organization']}",
+            f"© Copyright: {metadata['copyright']}",
+            f"🎧 Genre: {metadata['genre']}",
+            f"⏱ Length: {int(metadata['length'])} seconds"
         ]
-    except Exception as e:
-        lines = [f"❌ Error reading metadata: {e}"]
 
     metadata_display.config(state="normal")
     metadata_display.delete("1.0", tk.END)
     metadata_display.insert(tk.END, "\n".join(lines))
     metadata_display.config(state="disabled")
 
-# Folder selection row
-browser_top = tk.Frame(tab_browser)
-browser_top.pack(padx=20, pady=(10,5), anchor="w")
+def show_similar_tracks(song_path):
+    """List the tagged tracks whose tag scores are closest to this one (cosine similarity)."""
+    global similarity_index, similar_paths
+    similar_listbox.delete(0, tk.END)
+    similar_paths = []
+    try:
+        model = tagger_engine.ensemble_name(selected_models() or [tagger_engine.DEFAULT_MODEL])
+        store_dir = os.path.join(RESULTS_DIR, tagger_store.STORE_DIRNAME)
+        if similarity_index is None or similarity_index.folder != os.path.join(store_dir, model):
+            similarity_index = tagger_store.SimilarityIndex(store_dir, model)
+        else:
+            similarity_index.refresh()  # tracks tagged since the last lookup
+        matches = similarity_index.similar(song_path, SIMILAR_COUNT)
+    except Exception as e:
+        similar_listbox.insert(tk.END, f"❌ Could not read the score store: {e}")
+        return
+    if song_path not in similarity_index:
+        similar_listbox.insert(tk.END, "Tag this song with the Genre Tagger to find similar tracks.")
+        return
+    for path, similarity in matches:
+        similar_paths.append(path)
+        similar_listbox.insert(tk.END, f"{similarity:.2f}  {os.path.basename(path)}")
+
+def open_similar_track(event=None):
+    """Jump to a similar track in the song list, if it is in the folder being browsed."""
+    selected = similar_listbox.curselection()
+    if not selected or selected[0] >= len(similar_paths):
+        return
+    relpath = os.path.relpath(similar_paths[selected[0]], os.path.abspath(browser_folder_var.get()))
+    index = song_listbox.index_of(relpath)
+    if index is not None:
+        song_listbox.select(index)
+
+def build_browser_tab():
+    global song_listbox, metadata_display, similar_listbox
+    build_header(tab_browser, "Song Browser")
+    # Folder selection row
+    browser_top = tk.Frame(tab_browser)
+    browser_top.pack(padx=20, pady=(10,5), anchor="w")
 
-tk.Button(browser_top, text="📂 Select Folder", command=browse_song_folder).grid(row=0, column=0, padx=(0, 5))
-tk.Label(browser_top, textvariable=browser_folder_var, fg="blue").grid(row=0, column=1)
+    tk.Button(browser_top, text="📂 Select Folder", command=browse_song_folder).grid(row=0, column=0, padx=(0, 5))
+    tk.Label(browser_top, textvariable=browser_folder_var, fg="blue").grid(row=0, column=1)
+    tk.Label(browser_top, textvariable=browser_count_var).grid(row=0, column=2, padx=(10, 0))
 
-# Song Listbox
-song_listbox = tk.Listbox(tab_browser, width=50, height=20)
-song_listbox.pack(side="left", padx=(20,10), pady=(5,10), anchor="n")
-song_listbox.bind("<<ListboxSelect>>", show_song_metadata)
+    # Song Listbox (only the visible rows are ever handed to Tk)
+    song_listbox = tagger_browser.VirtualListbox(tab_browser, width=50, height=20, on_select=show_song_metadata)
+    song_listbox.pack(side="left", padx=(20,10), pady=(5,10), anchor="n")
 
-# Metadata Viewer
-metadata_frame = tk.Frame(tab_browser)
-metadata_frame.pack(side="left", fill="both", expand=True, padx=(0,20), pady=(5,10), anchor="n")
+    # Metadata Viewer
+    metadata_frame = tk.Frame(tab_browser)
+    metadata_frame.pack(side="left", fill="both", expand=True, padx=(0,20), pady=(5,10), anchor="n")
 
-metadata_display = scrolledtext.ScrolledText(metadata_frame, wrap=tk.WORD, width=45, height=20, state="disabled")
-metadata_display.pack(fill="both", expand=True)
+    metadata_display = scrolledtext.ScrolledText(metadata_frame, wrap=tk.WORD, width=45, height=11, state="disabled")
+    metadata_display.pack(fill="both", expand=True)
 
-# Placeholder for Player
-player_placeholder = tk.Label(metadata_frame, text="🎵 [Player Placeholder]", font=("Helvetica", 10, "italic"))
-player_placeholder.pack(pady=10)
+    # Similar tracks, from the stored tag scores
+    tk.Label(metadata_frame, text="🔗 Similar tracks (double-click to open)").pack(anchor="w", pady=(8, 0))
+    similar_listbox = tk.Listbox(metadata_frame, width=45, height=8)
+    similar_listbox.pack(fill="x")
+    similar_listbox.bind("<Double-Button-1>", open_similar_track)
+
+    # Placeholder for Player
+    player_placeholder = tk.Label(metadata_frame, text="🎵 [Player Placeholder]", font=("Helvetica", 10, "italic"))
+    player_placeholder.pack(pady=10)
 
 
 # ========================
@@ -340,59 +594,131 @@ def browse_meta_folder():
     if folder:
         meta_folder_var.set(folder)
 
+meta_progress_bar = None
+meta_status_var = tk.StringVar()
+meta_apply_button = None
+meta_cancel_button = None
+meta_running = False
+meta_cancel = False
+MAX_LISTED_FAILURES = 10
+
 def apply_metadata():
+    """Write the filled-in fields to every MP3 in the folder on a worker pool, skipping files that already match."""
+    global meta_running, meta_cancel
+    if meta_running:
+        return
     folder = meta_folder_var.get()
     if not os.path.isdir(folder):
         messagebox.showerror("Error", "Please select a valid folder.")
         return
 
-    files = [f for f in os.listdir(folder) if f.lower().endswith(".mp3")]
+    updates = {tagger_id3.EDITOR_FIELDS[field]: var.get().strip()
+               for field, var in meta_fields_vars.items() if var.get().strip()}
+    if not updates:
+        messagebox.showwarning("Nothing to apply", "Fill in at least one field.")
+        return
+
+    def scan_worker():
+        try:
+            files = list(make_scanner(folder))
+        except Exception as e:
+            post_call(metadata_done, None, str(e))
+            return
+        post_call(confirm_metadata, folder, files, updates)
+
+    # The folder is scanned in the background so a big library doesn't freeze the window
+    meta_running = True
+    meta_cancel = False
+    meta_apply_button.config(state="disabled")
+    meta_status_var.set("🔎 Scanning...")
+    threading.Thread(target=scan_worker, daemon=True).start()
+
+def confirm_metadata(folder, files, updates):
+    """Ask before writing to the scanned files, then start the edit (Tk thread)."""
+    global meta_running
     if not files:
+        meta_running = False
+        meta_apply_button.config(state="normal")
+        meta_status_var.set("")
         messagebox.showwarning("No MP3s", "No MP3 files found in this folder.")
         return
 
     confirm = messagebox.askyesno("Confirm", f"Apply metadata to {len(files)} MP3 files?")
     if not confirm:
+        meta_running = False
+        meta_apply_button.config(state="normal")
+        meta_status_var.set("")
         return
 
-    updates = {field: var.get().strip() for field, var in meta_fields_vars.items() if var.get().strip()}
+    def report(done, total, filename):
+        post_call(update_meta_progress, done, total, filename)
 
-    for fname in files:
+    def edit_worker():
         try:
-            path = os.path.join(folder, fname)
-            audio = MP3(path, ID3=EasyID3)
-
-            for field, value in updates.items():
-                # Map user-friendly names to EasyID3 keys
-                if field == "Contributing Artist":
-                    audio["artist"] = value
-                elif field == "Album Artist":
-                    audio["albumartist"] = value
-                elif field == "Album Title":
-                    audio["album"] = value
-                elif field == "Year":
-                    audio["date"] = value
-                elif field == "Publisher":
-                    audio["organization"] = value
-                elif field == "Copyright":
-                    audio["copyright"] = value
-
-            audio.save()
+            summary = tagger_id3.edit_files(folder, files, updates,
+                                            should_stop=lambda: meta_cancel, on_progress=report)
         except Exception as e:
-            print(f"Error updating {fname}: {e}")
-
-    messagebox.showinfo("Done", f"Updated metadata on {len(files)} files.")
-
-
-meta_frame = tk.LabelFrame(tab_metadata, text="Bulk Metadata Fields", padx=10, pady=10)
-meta_frame.pack(padx=20, pady=20, fill="x")
-fields = ["Contributing Artist", "Album Artist", "Album Title", "Year", "Publisher", "Copyright"]
-for i, label in enumerate(fields):
-    tk.Label(meta_frame, text=label + ":").grid(row=i, column=0, sticky="w")
-    tk.Entry(meta_frame, textvariable=meta_fields_vars[label], width=50).grid(row=i, column=1, pady=3)
-tk.Button(meta_frame, text="📂 Select Folder", command=browse_meta_folder).grid(row=len(fields), column=0, pady=15)
-tk.Button(meta_frame, text="💾 Apply Metadata", command=apply_metadata).grid(row=len(fields), column=1, pady=15)
-tk.Label(meta_frame, textvariable=meta_folder_var, fg="blue").grid(row=len(fields)+1, column=0, columnspan=2, sticky="w", pady=(5,0))
+            post_call(metadata_done, None, str(e))
+            return
+        post_call(metadata_done, summary, None)
+
+    meta_cancel_button.config(state="normal")
+    update_meta_progress(0, len(files), "")
+    threading.Thread(target=edit_worker, daemon=True).start()
+
+def cancel_metadata():
+    global meta_cancel
+    meta_cancel = True
+    meta_status_var.set("⛔ Cancelling after the files in progress...")
+
+def update_meta_progress(done, total, filename):
+    meta_progress_bar["maximum"] = max(total, 1)
+    meta_progress_bar["value"] = done
+    if not meta_cancel:
+        meta_status_var.set(f"{done}/{total} {filename}")
+
+def metadata_done(summary, error):
+    """Show how the bulk edit went (Tk thread)."""
+    global meta_running
+    meta_running = False
+    meta_apply_button.config(state="normal")
+    meta_cancel_button.config(state="disabled")
+    if error is not None:
+        meta_status_var.set("❌ Metadata update failed")
+        messagebox.showerror("Error", f"Metadata update failed: {error}")
+        return
+    meta_status_var.set(("⛔ " if summary.cancelled else "✅ ") + summary.report())
+    text = summary.report()
+    if summary.changed:
+        text += f"\n\n{summary.stats.bytes_rewritten / (1024 * 1024):.1f} MB rewritten"
+    if summary.failures:
+        text += "\n\nFailed:\n" + "\n".join(f"{name}: {message}"
+                                              for name, message in summary.failures[:MAX_LISTED_FAILURES])
+        if len(summary.failures) > MAX_LISTED_FAILURES:
+            text += f"\n...and {len(summary.failures) - MAX_LISTED_FAILURES} more"
+        messagebox.showwarning("Done", text)
+    else:
+        messagebox.showinfo("Done", text)
+
+
+def build_metadata_tab():
+    global meta_progress_bar, meta_apply_button, meta_cancel_button
+    build_header(tab_metadata, "Metadata Editor")
+    meta_frame = tk.LabelFrame(tab_metadata, text="Bulk Metadata Fields", padx=10, pady=10)
+    meta_frame.pack(padx=20, pady=20, fill="x")
+    fields = ["Contributing Artist", "Album Artist", "Album Title", "Year", "Publisher", "Copyright"]
+    for i, label in enumerate(fields):
+        tk.Label(meta_frame, text=label + ":").grid(row=i, column=0, sticky="w")
+        tk.Entry(meta_frame, textvariable=meta_fields_vars[label], width=50).grid(row=i, column=1, pady=3)
+    tk.Button(meta_frame, text="📂 Select Folder", command=browse_meta_folder).grid(row=len(fields), column=0, pady=15)
+    meta_apply_button = tk.Button(meta_frame, text="💾 Apply Metadata", command=apply_metadata)
+    meta_apply_button.grid(row=len(fields), column=1, pady=15)
+    tk.Label(meta_frame, textvariable=meta_folder_var, fg="blue").grid(row=len(fields)+1, column=0, columnspan=2, sticky="w", pady=(5,0))
+    meta_cancel_button = tk.Button(meta_frame, text="⛔ Cancel", command=cancel_metadata, state="disabled")
+    meta_cancel_button.grid(row=len(fields), column=2, pady=15)
+    meta_progress_bar = ttk.Progressbar(meta_frame, orient="horizontal", length=400, mode="determinate")
+    meta_progress_bar.grid(row=len(fields)+2, column=0, columnspan=3, sticky="we", pady=(10, 0))
+    tk.Label(meta_frame, textvariable=meta_status_var, anchor="w").grid(row=len(fields)+3, column=0, columnspan=3, sticky="w")
 
 
 # ========================
@@ -409,87 +735,134 @@ def browse_rename_folder():
     if folder:
         rename_folder_var.set(folder)
 
+rename_plan = None
+rename_status_var = tk.StringVar()
+rename_busy = False
+
 def preview_renames():
+    """Scan the folder and read tags once in the background; the plan is kept for Confirm."""
+    global rename_plan, rename_busy
     folder = rename_folder_var.get()
     prefix = rename_prefix_var.get()
     mode = rename_mode_var.get()
+    if rename_busy:
+        return
     if not os.path.isdir(folder):
         messagebox.showerror("Error", "Please select a valid folder.")
         return
 
-    files = [f for f in os.listdir(folder) if f.lower().endswith(".mp3")]
-    if not files:
+    def plan_worker():
+        try:
+            files = list(make_scanner(folder))
+            plan = tagger_rename.build_plan(folder, files, mode, prefix) if files else None
+        except Exception as e:
+            post_call(show_rename_plan, None, str(e))
+            return
+        post_call(show_rename_plan, plan, None)
+
+    rename_plan = None
+    rename_busy = True
+    rename_status_var.set("🔎 Reading files...")
+    threading.Thread(target=plan_worker, daemon=True).start()
+
+def show_rename_plan(plan, error):
+    """Show a freshly built plan (Tk thread)."""
+    global rename_plan, rename_busy
+    rename_busy = False
+    rename_status_var.set("")
+    if error is not None:
+        messagebox.showerror("Error", f"Could not preview the renames: {error}")
+        return
+    if plan is None:
         messagebox.showwarning("No MP3s", "No MP3 files found in this folder.")
         return
+    rename_plan = plan
 
     preview_output.config(state='normal')
     preview_output.delete(1.0, tk.END)
-
-    for i, fname in enumerate(files, start=1):
-        old_path = os.path.join(folder, fname)
-
-        if mode == "Use prefix":
-            new_name = f"{prefix}{i:02}.mp3"
-        else:  # Use genre tag
-            try:
-                audio = MP3(old_path, ID3=EasyID3)
-                genre = audio.get("genre", ["unknown"])[0].split(",")[0].strip()
-                new_name = f"{genre}{i:02}.mp3"
-            except:
-                new_name = f"unknown{i:02}.mp3"
-
-        preview_output.insert(tk.END, f"{fname} → {new_name}\n")
-
+    preview_output.insert(tk.END, "".join(f"{old} → {new}\n" for old, new in plan.renames))
+    if plan.collisions:
+        preview_output.insert(tk.END, "\n⚠️ Conflicts (nothing will be renamed until they are fixed):\n")
+        preview_output.insert(tk.END, "".join(f"  {problem}\n" for problem in plan.collisions))
     preview_output.config(state='disabled')
+    rename_status_var.set(f"{len(plan.changes)} of {len(plan.renames)} files will be renamed"
+                          + (f", {len(plan.collisions)} conflicts" if plan.collisions else ""))
 
 def confirm_renames():
-    folder = rename_folder_var.get()
-    prefix = rename_prefix_var.get()
-    mode = rename_mode_var.get()
-
-    if not messagebox.askyesno("Confirm Rename", "Are you sure you want to rename the files?"):
+    """Run the previewed plan exactly as shown."""
+    global rename_busy
+    if rename_busy:
+        return
+    plan = rename_plan
+    if plan is None or not plan.matches(rename_folder_var.get(), rename_mode_var.get(), rename_prefix_var.get()):
+        messagebox.showwarning("Preview first", "Preview the renames with the current settings before confirming.")
+        return
+    if plan.collisions:
+        messagebox.showerror("Conflicts", "The preview has conflicting names:\n" + "\n".join(plan.collisions[:10]))
+        return
+    if not plan.changes:
+        messagebox.showinfo("Nothing to do", "All files already have their planned names.")
         return
 
-    files = [f for f in os.listdir(folder) if f.lower().endswith(".mp3")]
-
-    for i, fname in enumerate(files, start=1):
-        old_path = os.path.join(folder, fname)
-
-        if mode == "Use prefix":
-            new_name = f"{prefix}{i:02}.mp3"
-        else:
-            try:
-                audio = MP3(old_path, ID3=EasyID3)
-                genre = audio.get("genre", ["unknown"])[0].split(",")[0].strip()
-                new_name = f"{genre}{i:02}.mp3"
-            except:
-                new_name = f"unknown{i:02}.mp3"
-
-        new_path = os.path.join(folder, new_name)
-        os.rename(old_path, new_path)
+    if not messagebox.askyesno("Confirm Rename", f"Are you sure you want to rename {len(plan.changes)} files?"):
+        return
 
-    messagebox.showinfo("Done", f"Renamed {len(files)} files.")
+    def rename_worker():
+        try:
+            renamed = tagger_rename.execute_plan(plan)
+        except tagger_rename.RollbackError as e:
+            post_call(renames_done, None, str(e), e.stranded)
+            return
+        except Exception as e:
+            post_call(renames_done, None, str(e))
+            return
+        post_call(renames_done, renamed, None)
+
+    rename_busy = True
+    rename_status_var.set("✍️ Renaming...")
+    threading.Thread(target=rename_worker, daemon=True).start()
+
+def renames_done(renamed, error, stranded=()):
+    global rename_busy
+    rename_busy = False
+    if stranded:
+        rename_status_var.set(f"❌ {len(stranded)} files are left half-renamed")
+        listed = "\n".join(f"{now} (was {was})" for now, was in stranded[:MAX_LISTED_FAILURES])
+        if len(stranded) > MAX_LISTED_FAILURES:
+            listed += f"\n...and {len(stranded) - MAX_LISTED_FAILURES} more"
+        messagebox.showerror("Rename failed", f"{error}\n\nThese files could not be put back:\n{listed}")
+        return
+    if error is not None:
+        rename_status_var.set("❌ Nothing was renamed")
+        messagebox.showerror("Rename failed", f"{error}\n\nNo files were renamed.")
+        return
+    messagebox.showinfo("Done", f"Renamed {renamed} files.")
     preview_renames()
 
-# ==== UI Layout for Batch Renamer ====
-rename_frame = tk.LabelFrame(tab_renamer, text="Rename Options", padx=10, pady=10)
-rename_frame.pack(padx=20, pady=10, fill="x")
+def build_renamer_tab():
+    global preview_output
+    build_header(tab_renamer, "Batch Renamer")
+    # ==== UI Layout for Batch Renamer ====
+    rename_frame = tk.LabelFrame(tab_renamer, text="Rename Options", padx=10, pady=10)
+    rename_frame.pack(padx=20, pady=10, fill="x")
 
-tk.Label(rename_frame, text="Folder:").grid(row=0, column=0, sticky="w")
-tk.Entry(rename_frame, textvariable=rename_folder_var, width=50).grid(row=0, column=1, padx=5)
-tk.Button(rename_frame, text="📂 Browse", command=browse_rename_folder).grid(row=0, column=2, padx=5)
+    tk.Label(rename_frame, text="Folder:").grid(row=0, column=0, sticky="w")
+    tk.Entry(rename_frame, textvariable=rename_folder_var, width=50).grid(row=0, column=1, padx=5)
+    tk.Button(rename_frame, text="📂 Browse", command=browse_rename_folder).grid(row=0, column=2, padx=5)
 
-tk.Label(rename_frame, text="Prefix (for option 1):").grid(row=1, column=0, sticky="w", pady=(10, 0))
-tk.Entry(rename_frame, textvariable=rename_prefix_var).grid(row=1, column=1, pady=(10, 0), sticky="w")
+    tk.Label(rename_frame, text="Prefix (for option 1):").grid(row=1, column=0, sticky="w", pady=(10, 0))
+    tk.Entry(rename_frame, textvariable=rename_prefix_var).grid(row=1, column=1, pady=(10, 0), sticky="w")
 
-tk.Label(rename_frame, text="Rename Mode:").grid(row=2, column=0, sticky="w", pady=(10, 0))
-ttk.Combobox(rename_frame, textvariable=rename_mode_var, values=["Use prefix", "Use genre tag"], state="readonly").grid(row=2, column=1, pady=(10, 0), sticky="w")
+    tk.Label(rename_frame, text="Rename Mode:").grid(row=2, column=0, sticky="w", pady=(10, 0))
+    ttk.Combobox(rename_frame, textvariable=rename_mode_var, values=["Use prefix", "Use genre tag"], state="readonly").grid(row=2, column=1, pady=(10, 0), sticky="w")
 
-tk.Button(rename_frame, text="🧪 Preview Rename", command=preview_renames).grid(row=3, column=0, pady=15)
-tk.Button(rename_frame, text="✅ Confirm Rename", command=confirm_renames).grid(row=3, column=1, pady=15)
+    tk.Button(rename_frame, text="🧪 Preview Rename", command=preview_renames).grid(row=3, column=0, pady=15)
+    tk.Button(rename_frame, text="✅ Confirm Rename", command=confirm_renames).grid(row=3, column=1, pady=15)
 
-preview_output = scrolledtext.ScrolledText(tab_renamer, wrap=tk.WORD, width=80, height=20, state='disabled')
-preview_output.pack(padx=20, pady=5)
+    tk.Label(rename_frame, textvariable=rename_status_var, anchor="w").grid(row=4, column=0, columnspan=3, sticky="w")
+
+    preview_output = scrolledtext.ScrolledText(tab_renamer, wrap=tk.WORD, width=80, height=20, state='disabled')
+    preview_output.pack(padx=20, pady=5)
 
 
 # ========================
@@ -507,181 +880,6 @@ def choose_excel_folder():
     if folder_path:
         custom_output_folder.set(folder_path)
 
-# ========================
-# Tagging Engine Logic
-# ========================
-
-def process_files(folder_path, do_genre, do_excel, gui_update_fn, update_progress_fn, top_tags_only, excel_only, input_length, custom_excel_folder=None, input_overlap=0.5):
-    """
-    Process MP3 files in the selected folder and tag them using musicnn.
-    This function supports tagging, genre metadata writing, and Excel export.
-    """
-    global stop_flag
-    stop_flag = False
-    songs_tagged = []
-    files = [f for f in os.listdir(folder_path) if f.lower().endswith(".mp3")]
-    total = len(files)
-    start_time = time.time()
-
-    for i, filename in enumerate(files):
-        if stop_flag:
-            elapsed = time.time() - start_time
-            mins, secs = divmod(int(elapsed), 60)
-            current_track_label.config(text="⛔ Stopped")
-            gui_update_fn(f"🚩 Stopped. Total time spent: {mins:02}:{secs:02}")
-            return
-
-        filepath = os.path.join(folder_path, filename)
-        gui_update_fn(f"\n🎵 [{i+1}/{total}] Tagging: {filename}")
-        current_track_label.config(text=f"Now tagging: {filename}")
-
-        try:
-            # Load audio metadata
-            audio = MP3(filepath)
-            input_length = float(input_length)
-
-            # Skip files that are too short
-            if audio.info.length < 3.0:
-                gui_update_fn(f"⚠️ Skipping {filename} – too short ({audio.info.length:.2f}s)")
-                continue
-            if audio.info.length < input_length:
-                gui_update_fn(f"⚠️ Skipping {filename} – shorter than input window ({audio.info.length:.2f}s)")
-                continue
-
-            try:
-                gui_update_fn(f"🧪 Using input window: {input_length}s with {int(input_overlap * 100)}% overlap")
-                track_start = time.time()
-
-                # Extract tags using musicnn
-                tag_scores_raw, tag_names, _ = extractor(
-                    filepath,
-                    model='MSD_musicnn',
-                    input_length=input_length,
-                    input_overlap=input_overlap,
-                )
-
-                # Set per-track progress bar
-                track_progress_bar["maximum"] = tag_scores_raw.shape[0]
-                track_progress_bar["value"] = 0
-
-                # Print elapsed time
-                track_elapsed = time.time() - track_start
-                gui_update_fn(f"🕒 Time spent tagging this track: {track_elapsed:.2f}s")
-
-                # Show processed duration and chunk count
-                num_windows = tag_scores_raw.shape[0]
-                total_processed = num_windows * input_length
-                capped_total = min(audio.info.length, total_processed)
-                gui_update_fn(f"📊 Processed with {num_windows} overlapping windows of {input_length:.1f}s each")
-                gui_update_fn(f"📊 Total processed: ~{capped_total:.1f}s (track length: {audio.info.length:.1f}s)")
-
-                # Average over all tag scores
-                tag_scores = np.mean(tag_scores_raw, axis=0)
-
-                # Instead of analyzing whole track instantly, simulate real-time window tagging
-                track_progress_bar["maximum"] = tag_scores_raw.shape[0]
-                track_progress_bar["value"] = 0
-
-                for win_idx, window_scores in enumerate(tag_scores_raw):
-                    if stop_flag:
-                        break
-
-                    # Optional: Add small delay to simulate processing time if you want
-                    # Fix both progress bars 
-                    time.sleep(0.01)
-
-                    track_progress_bar["value"] = win_idx + 1
-                    root.update_idletasks()
-
-                # After loop completes, average the scores
-                tag_scores = np.mean(tag_scores_raw, axis=0)
-
-                # Safety check on result shape
-                if not isinstance(tag_scores, np.ndarray) or len(tag_scores) != len(tag_names):
-                    gui_update_fn(f"⚠️ Skipping {filename} due to tag length mismatch")
-                    continue
-
-            except Exception as e:
-                gui_update_fn(f"❌ Error extracting tags from {filename}: {e}")
-                continue
-
-            # Sort and keep top tags
-            sorted_indices = np.argsort(tag_scores)[::-1]
-            tags = []
-            for idx in sorted_indices[:10]:
-                try:
-                    score_val = float(tag_scores[idx])
-                    tags.append((tag_names[idx], score_val))
-                except (ValueError, TypeError):
-                    gui_update_fn(f"⚠️ Skipping invalid score: {tag_names[idx]} = {tag_scores[idx]}")
-
-            if top_tags_only:
-                tags = tags[:3]
-
-            # Format tag text and store results
-            top3 = [tag for tag, _ in tags[:3]]
-            tag_text = "\n".join([
-                f"⭐ {tag} ({score:.2f})" if idx < 3 else f"• {tag} ({score:.2f})"
-                for idx, (tag, score) in enumerate(tags)
-            ])
-            gui_update_fn(tag_text)
-            songs_tagged.append((filename, tags))
-
-            # Update MP3 metadata with top tags
-            if do_genre and not excel_only:
-                try:
-                    audio = MP3(filepath, ID3=EasyID3)
-                    if audio.tags is None:
-                        try:
-                            audio.add_tags()
-                        except Exception as e:
-                            gui_update_fn(f"⚠️ Could not add ID3 tags to {filename}: {e}")
-                            continue
-
-                    audio['genre'] = ', '.join(top3)
-                    audio.save()
-                    gui_update_fn(f"✅ Genre updated: {top3}")
-
-                except Exception as e:
-                    gui_update_fn(f"⚠️ Error writing to {filename}: {e}")
-
-        except Exception as e:
-            gui_update_fn(f"❌ Error tagging {filename}: {e}")
-            continue
-
-        # Update overall progress
-        elapsed = time.time() - start_time
-        avg_time = elapsed / (i + 1)
-        est_remaining = avg_time * (total - i - 1)
-        mins, secs = divmod(est_remaining, 60)
-        update_progress_fn(i + 1, total, f"⏱️ Est. time left: {int(mins):02d}:{int(secs):02d}")
-
-    # Export to Excel if requested
-    if do_excel and songs_tagged:
-        excel_path = custom_excel_folder if custom_excel_folder else folder_path
-        save_excel(excel_path, songs_tagged)
-
-    if not stop_flag:
-        total = time.time() - start_time
-        gui_update_fn(f"🎉 All done tagging! Total time: {str(timedelta(seconds=int(total)))}")
-        current_track_label.config(text="")
-        messagebox.showinfo("Done", "🎉 All done tagging!")
-
-# ========================
-# Excel Export Helper
-# ========================
-
-def save_excel(folder_path, songs_tagged):
-    """Save tagging results to an Excel file."""
-    output_file = os.path.join(folder_path, "suno_tags.xlsx")
-    wb = Workbook()
-    ws = wb.active
-    ws.append(["Filename", "Tag", "Score"])
-    for filename, tag_score_list in songs_tagged:
-        for tag, score in tag_score_list:
-            ws.append([filename, tag, round(score, 4)])
-    wb.save(output_file)
-
 # ========================
 # Utility Functions
 # ========================
@@ -692,9 +890,12 @@ def choose_folder():
     folder_var.set(folder_path)
 
 def update_console(text):
-    """Append a line of text to the output console."""
+    """Append a line of text to the output console, keeping at most MAX_CONSOLE_LINES."""
     output_text.config(state='normal')
     output_text.insert(tk.END, f"{text}\n")
+    excess = int(output_text.index("end-1c").split(".")[0]) - MAX_CONSOLE_LINES
+    if excess > 0:
+        output_text.delete("1.0", f"{excess + 1}.0")
     output_text.see(tk.END)
     output_text.config(state='disabled')
 
@@ -706,17 +907,89 @@ def clear_console():
 
 def update_progress(current, total, status=""):
     """Update the main progress bar and file status label."""
+    progress_bar["maximum"] = max(total, 1)
     progress_bar["value"] = current
     progress_label.config(text=f"{current}/{total} files tagged")
     timer_label.config(text=status)
-    root.update_idletasks()
+
+def update_track_status(text):
+    """Show which track is being tagged."""
+    current_track_label.config(text=text)
+
+def update_track_progress(done, total):
+    """Update the per-track progress bar."""
+    track_progress_bar["maximum"] = total
+    track_progress_bar["value"] = done
+
+def show_done():
+    """Let the user know a tagging run has finished."""
+    messagebox.showinfo("Done", "🎉 All done tagging!")
+
+# ========================
+# Worker → GUI Event Queue
+# ========================
+# Tk may only be touched from the main thread. Background threads post events here instead,
+# and drain_gui_events() applies them on a timer: console lines in one insert, progress
+# updates collapsed to the latest value.
+gui_events = queue.Queue()
+GUI_POLL_MS = 50
+MAX_CONSOLE_LINES = 5000
+
+def post_console(text):
+    gui_events.put(("console", text))
+
+def post_progress(current, total, status=""):
+    gui_events.put(("progress", (current, total, status)))
+
+def post_track_status(text):
+    gui_events.put(("track_status", (text,)))
+
+def post_track_progress(done, total):
+    gui_events.put(("track_progress", (done, total)))
+
+def post_call(fn, *args):
+    """Run fn(*args) on the Tk thread, after the events posted before it."""
+    gui_events.put(("call", (fn, args)))
+
+def drain_gui_events():
+    latest = {}
+    lines = []
+    calls = []
+    while True:
+        try:
+            kind, payload = gui_events.get_nowait()
+        except queue.Empty:
+            break
+        if kind == "console":
+            lines.append(payload)
+        elif kind == "call":
+            calls.append(payload)
+        else:
+            latest[kind] = payload
+    if lines:
+        update_console("\n".join(lines))
+    if "progress" in latest:
+        update_progress(*latest["progress"])
+    if "track_status" in latest:
+        update_track_status(*latest["track_status"])
+    if "track_progress" in latest:
+        update_track_progress(*latest["track_progress"])
+    for fn, args in calls:
+        fn(*args)
+    root.after(GUI_POLL_MS, drain_gui_events)
 
 # ========================
 # Tagging Controls
 # ========================
 
-def start_tagging():
+def start_tagging(from_watch=False, resume=False):
     """Start the tagging process in a new thread after validating settings."""
+    global tagging_thread, stop_flag
+    if tagging_thread is not None and tagging_thread.is_alive():
+        if from_watch:
+            schedule_watch()  # previous pass still running, poll again later
+        return
+
     folder = folder_var.get()
     if not folder:
         messagebox.showerror("Error", "Please choose a folder.")
@@ -731,7 +1004,10 @@ def start_tagging():
         messagebox.showerror("Error", "Please select a tagging mode.")
         return
 
-    clear_console()
+    if from_watch:
+        update_console(f"\n👀 Watch: checking {folder} for new files at {time.strftime('%H:%M:%S')}")
+    else:
+        clear_console()
     progress_bar["value"] = 0
     progress_label.config(text="0/0 files tagged")
     timer_label.config(text="")
@@ -739,20 +1015,110 @@ def start_tagging():
     input_length = float(duration_var.get())
     input_overlap = int(overlap_var.get()) / 100.0
     excel_path = custom_output_folder.get() if use_custom_output.get() else None
+    try:
+        cache_max_mb = float(cache_max_mb_var.get())
+        feature_cache_max_mb = float(feature_cache_max_mb_var.get())
+        float(watch_interval_var.get())
+        sample_value = float(sample_value_var.get())
+    except ValueError:
+        messagebox.showerror("Error", "Cache size, watch interval and sample size must be numbers.")
+        return
+
+    models = selected_models()
+    if not models:
+        messagebox.showerror("Error", "Please select at least one model.")
+        return
+    if input_length != 3 and any("vgg" in model for model in models):
+        messagebox.showerror("Error", "The VGG models only work with 3-second chunks.")
+        return
 
     # Launch processing in a thread
-    threading.Thread(
-        target=process_files,
-        args=(folder, do_genre, do_excel, update_console, update_progress,
+    stop_flag = False
+    tagging_thread = threading.Thread(
+        target=tagging_worker,
+        args=(folder, do_genre, do_excel, post_console, post_progress,
               var_top_tags_only.get(), excel_only, input_length,
               excel_path, input_overlap),
+        kwargs=dict(
+            batch_size=int(batch_size_var.get()),
+            workers=int(workers_var.get()),
+            decode_depth=int(decode_depth_var.get()),
+            write_depth=int(write_depth_var.get()),
+            bypass_cache=bypass_cache_var.get(),
+            cache_max_mb=cache_max_mb,
+            feature_cache=feature_cache_var.get(),
+            feature_cache_max_mb=feature_cache_max_mb,
+            models=models,
+            ensemble_merge=ensemble_merge_var.get(),
+            incremental=incremental_var.get() or watch_var.get(),
+            settle_seconds=WATCH_SETTLE_SECONDS if watch_var.get() else 0,
+            early_exit=early_exit_var.get(),
+            early_exit_patience=int(early_exit_patience_var.get()),
+            sample_mode=sample_mode_var.get(),
+            sample_value=sample_value,
+            sample_placement=sample_placement_var.get(),
+            **scan_options(),
+            export_formats=("xlsx",) + (("csv",) if export_csv_var.get() else ()) + (("jsonl",) if export_jsonl_var.get() else ()),
+            store_scores=store_scores_var.get(),
+            store_taggrams=store_taggrams_var.get(),
+            trace=trace_var.get(),
+            chrome_trace=chrome_trace_var.get(),
+            resume=resume,
+            should_stop=lambda: stop_flag,
+            track_status_fn=post_track_status,
+            track_progress_fn=post_track_progress,
+            done_fn=None if from_watch else lambda: post_call(show_done),
+        ),
         daemon=True
-    ).start()
+    )
+    tagging_thread.start()
+
+def selected_models():
+    """Ticked models in musicnn's order; more than one means ensemble tagging."""
+    return [name for name in tagger_engine.MODELS if model_vars[name].get()]
+
+def resume_tagging():
+    """Continue the last run that was stopped or interrupted, skipping the files it finished."""
+    last_run = tagger_journal.load_last_run(os.path.join(DATA_DIR, tagger_journal.JOURNAL_FILENAME))
+    if last_run is None or last_run.finished:
+        messagebox.showinfo("Nothing to resume", "The last tagging run finished, so there is nothing to resume.")
+        return
+    if not os.path.isdir(last_run.folder_path):
+        messagebox.showerror("Error", f"The last run's folder is gone:\n{last_run.folder_path}")
+        return
+    folder_var.set(last_run.folder_path)
+    start_tagging(resume=True)
+
+def tagging_worker(*args, **kwargs):
+    """Run one tagging pass, then queue the next folder poll if watch mode is on."""
+    try:
+        tagger_core.process_files(*args, **kwargs)
+    except Exception as e:
+        post_console(f"❌ Tagging stopped on an unexpected error: {e}")
+    finally:
+        # Even after an error, so watch mode keeps polling
+        post_call(tagging_pass_done)
+
+def tagging_pass_done():
+    if watch_var.get() and not stop_flag:
+        schedule_watch()
+
+def schedule_watch():
+    """Poll the tagging folder again after the watch interval."""
+    global watch_job
+    try:
+        minutes = max(float(watch_interval_var.get()), 0.1)
+    except ValueError:
+        minutes = WATCH_DEFAULT_MINUTES
+    watch_job = root.after(int(minutes * 60000), lambda: start_tagging(from_watch=True))
 
 def stop_tagging():
     """Trigger the stop flag to interrupt processing."""
-    global stop_flag
+    global stop_flag, watch_job
     stop_flag = True
+    if watch_job is not None:
+        root.after_cancel(watch_job)
+        watch_job = None
 
 # Folder Selection
 mp3_row = tk.Frame(tab_genre)
@@ -782,6 +1148,58 @@ for idx, label in enumerate(["0%", "25%", "50%", "75%"]):
     lbl.grid(row=1, column=idx, padx=28)
     overlap_tick_labels.append(lbl)
 
+# Performance Options
+perf_frame = tk.LabelFrame(tab_genre, text="⚡ Performance", padx=10, pady=5)
+perf_frame.pack(anchor="w", padx=20, pady=(10, 0), fill="x")
+tk.Label(perf_frame, text="Windows per inference batch (shared across tracks):").grid(row=0, column=0, sticky="w")
+batch_size_dropdown = ttk.Combobox(perf_frame, textvariable=batch_size_var, state="readonly", width=5,
+                                   values=["1", "8", "16", "32", "64", "128", "256"])
+batch_size_dropdown.grid(row=0, column=1, sticky="w", padx=5)
+tk.Label(perf_frame, text="Worker processes (each loads its own model):").grid(row=1, column=0, sticky="w")
+workers_dropdown = ttk.Combobox(perf_frame, textvariable=workers_var, state="readonly", width=5,
+                                values=[str(n) for n in range(1, (os.cpu_count() or 1) + 1)])
+workers_dropdown.grid(row=1, column=1, sticky="w", padx=5)
+tk.Label(perf_frame, text="Queue depth (tracks) decode → inference / inference → write:").grid(row=2, column=0, sticky="w")
+depth_frame = tk.Frame(perf_frame)
+depth_frame.grid(row=2, column=1, sticky="w", padx=5)
+depth_values = [str(n) for n in (0, 1, 2, 4, 8, 16, 32)]
+ttk.Combobox(depth_frame, textvariable=decode_depth_var, state="readonly", width=3, values=depth_values).pack(side="left")
+ttk.Combobox(depth_frame, textvariable=write_depth_var, state="readonly", width=3, values=depth_values).pack(side="left", padx=(5, 0))
+tk.Label(perf_frame, text="Result cache size limit (MB):").grid(row=3, column=0, sticky="w")
+tk.Entry(perf_frame, textvariable=cache_max_mb_var, width=7).grid(row=3, column=1, sticky="w", padx=5)
+tk.Checkbutton(perf_frame, text="♻️ Bypass result cache (re-tag every file)",
+               variable=bypass_cache_var).grid(row=4, column=0, columnspan=2, sticky="w")
+early_exit_frame = tk.Frame(perf_frame)
+early_exit_frame.grid(row=5, column=0, columnspan=2, sticky="w")
+tk.Checkbutton(early_exit_frame, text="🎯 Stop a track early once its top 3 tags settle, after",
+               variable=early_exit_var).pack(side="left")
+ttk.Combobox(early_exit_frame, textvariable=early_exit_patience_var, state="readonly", width=3,
+             values=["1", "2", "3", "4", "6", "8"]).pack(side="left", padx=5)
+tk.Label(early_exit_frame, text="stable batches").pack(side="left")
+sample_frame = tk.Frame(perf_frame)
+sample_frame.grid(row=6, column=0, columnspan=2, sticky="w")
+tk.Label(sample_frame, text="🎚️ Decode only a sample of each track:").pack(side="left")
+ttk.Combobox(sample_frame, textvariable=sample_mode_var, state="readonly", width=8,
+             values=list(tagger_engine.SAMPLE_MODES)).pack(side="left", padx=5)
+tk.Entry(sample_frame, textvariable=sample_value_var, width=5).pack(side="left")
+tk.Label(sample_frame, text="windows, placed").pack(side="left", padx=5)
+ttk.Combobox(sample_frame, textvariable=sample_placement_var, state="readonly", width=8,
+             values=list(tagger_engine.SAMPLE_PLACEMENTS)).pack(side="left")
+models_frame = tk.Frame(perf_frame)
+models_frame.grid(row=8, column=0, columnspan=2, sticky="w")
+tk.Label(models_frame, text="🧠 Models:").pack(side="left")
+for name in tagger_engine.MODELS:
+    tk.Checkbutton(models_frame, text=name, variable=model_vars[name]).pack(side="left")
+tk.Label(models_frame, text="tags:").pack(side="left", padx=(10, 0))
+ttk.Combobox(models_frame, textvariable=ensemble_merge_var, state="readonly", width=9,
+             values=list(tagger_engine.ENSEMBLE_MERGES)).pack(side="left", padx=5)
+feature_frame = tk.Frame(perf_frame)
+feature_frame.grid(row=7, column=0, columnspan=2, sticky="w")
+tk.Checkbutton(feature_frame, text="🧊 Cache spectrograms so new chunk settings skip decoding, up to",
+               variable=feature_cache_var).pack(side="left")
+tk.Entry(feature_frame, textvariable=feature_cache_max_mb_var, width=7).pack(side="left", padx=5)
+tk.Label(feature_frame, text="MB").pack(side="left")
+
 # Mode Dropdown
 tk.Label(tab_genre, text="What should we do with the tags?").pack(anchor="w", padx=20, pady=(10, 0))
 mode_dropdown = ttk.Combobox(tab_genre, textvariable=mode_var, state="readonly", values=(
@@ -803,10 +1221,30 @@ browse_button.grid(row=0, column=0, padx=(0, 5))
 custom_output_entry = tk.Entry(folder_frame, textvariable=custom_output_folder, width=50)
 custom_output_entry.grid(row=0, column=1)
 
+# Extra export formats, written alongside the Excel file as each track finishes
+export_frame = tk.Frame(tab_genre)
+export_frame.pack(anchor="w", padx=20)
+export_csv_checkbox = tk.Checkbutton(export_frame, text="Also write CSV", variable=export_csv_var)
+export_csv_checkbox.grid(row=0, column=0, sticky="w")
+export_jsonl_checkbox = tk.Checkbutton(export_frame, text="Also write JSONL", variable=export_jsonl_var)
+export_jsonl_checkbox.grid(row=0, column=1, sticky="w", padx=(15, 0))
+tk.Checkbutton(export_frame, text="🗄️ Keep all 50 tag scores", variable=store_scores_var).grid(row=1, column=0, sticky="w")
+tk.Checkbutton(export_frame, text="...and per-window scores", variable=store_taggrams_var).grid(row=1, column=1, sticky="w", padx=(15, 0))
+tk.Checkbutton(export_frame, text="🧾 Trace stage timings to logs", variable=trace_var).grid(row=2, column=0, sticky="w")
+tk.Checkbutton(export_frame, text="...and a Chrome trace", variable=chrome_trace_var).grid(row=2, column=1, sticky="w", padx=(15, 0))
+
 # Top Tags Only Option
 top_tags_checkbox = tk.Checkbutton(tab_genre, text="Only show top 3 tags", variable=var_top_tags_only)
 top_tags_checkbox.pack(anchor="w", padx=20)
 
+# Library Sync Options
+sync_frame = tk.Frame(tab_genre)
+sync_frame.pack(anchor="w", padx=20)
+tk.Checkbutton(sync_frame, text="🔁 Only tag new or changed files", variable=incremental_var).grid(row=0, column=0, sticky="w")
+tk.Checkbutton(sync_frame, text="👀 Watch folder, check every", variable=watch_var).grid(row=0, column=1, sticky="w", padx=(15, 0))
+tk.Entry(sync_frame, textvariable=watch_interval_var, width=4).grid(row=0, column=2)
+tk.Label(sync_frame, text="min").grid(row=0, column=3, sticky="w")
+
 # Load config initially
 trace_all()
 
@@ -818,8 +1256,10 @@ button_frame = tk.Frame(tab_genre)
 button_frame.pack(pady=10)
 tk.Button(button_frame, text="▶ Start Tagging", command=start_tagging,
           bg="#4CAF50", fg="white", padx=12, pady=5).grid(row=0, column=0, padx=10)
+tk.Button(button_frame, text="⏯ Resume Last Run", command=resume_tagging,
+          bg="#4CAF50", fg="white", padx=12, pady=5).grid(row=0, column=1, padx=10)
 tk.Button(button_frame, text="⛔ Stop", command=stop_tagging,
-          bg="#f44336", fg="white", padx=12, pady=5).grid(row=0, column=1, padx=10)
+          bg="#f44336", fg="white", padx=12, pady=5).grid(row=0, column=2, padx=10)
 
 # Progress and Status
 progress_bar = ttk.Progressbar(tab_genre, orient="horizontal", length=600, mode="determinate")
@@ -857,15 +1297,29 @@ help_text = """
 - Choose a folder of MP3s
 - Select how long each window should be (e.g., 3s, 5s)
 - Choose how much overlap you want (0–75%)
+- Pick the inference batch size under ⚡ Performance (bigger batches keep the CPU busier, watch tracks/sec)
+- Use more worker processes on many-core machines; each one loads its own copy of the model
+- Tracks tagged before with the same audio and settings come from the result cache (data/tag_cache.sqlite); tick "Bypass result cache" to re-tag them anyway
+- Tick several models to tag with all of them from one decode per track (the VGG models need 3-second chunks); "merge" averages the tags they share into one ranking, "separate" lists each model's own top tags and writes the genre from the models' best tags taken in turn (each model's #1, then each #2, until there are 3). The ⭐ tags are the ones written. The Excel Model column and the MP3's GENRE_MODELS tag say which model produced each tag
+- "Cache spectrograms" keeps each track's decoded log-mel spectrogram in data/feature_cache (oldest dropped past the size limit), so re-running with a different chunk length or overlap skips decoding entirely
+- "Stop a track early" scores windows spread across the track and moves on once the top 3 tags stop changing; the console shows windows used vs. total so you can judge the trade-off
+- "Decode only a sample" analyzes a count (or percent) of each track's windows, spread evenly, around the middle or at random, and only decodes those parts; "off" analyzes the whole track
+- Queue depths set how far decoding runs ahead of the model and the model ahead of the tag writer (0 = no overlap); the 🚦 lines at the end show which stage waited least, i.e. the bottleneck
 - Select what to do with the tags (Excel export, MP3 metadata, or both)
 - Optionally use a custom Excel folder and only keep top 3 tags
+- "Keep all 50 tag scores" saves every track's full score vector to results/score_store (per-window scores too if ticked), so tags can be re-derived later with tagger_store.py without re-running the model
+- Results are exported as each track finishes (suno_tags.xlsx is refreshed every 30s or so, CSV/JSONL after every track), so a stopped or crashed run keeps everything tagged so far
+- "Only tag new or changed files" skips anything unchanged since its last run with the same settings (the Excel export then only lists the newly tagged files)
+- "Trace stage timings" writes every file's open/decode/inference/aggregate/ID3/export times to logs/trace_<time>.jsonl and ends the run with p50/p95/p99 per stage and the slowest files (logs/trace_<time>_summary.json); the Chrome trace opens in chrome://tracing or ui.perfetto.dev
+- "Resume Last Run" continues a run that was stopped, crashed or cut off by a reboot: files it finished are skipped and their results go straight back into the export (the settings must match the interrupted run)
+- "Watch folder" keeps checking the folder in the background and tags new arrivals; Stop ends the watch
 
 ✍️ Batch Renamer
 -----------------
 - Choose a folder
 - Select "Use prefix" or "Use genre tag"
 - Preview before renaming
-- Confirm to batch rename all MP3s
+- Confirm to run exactly the previewed renames (preview again if files changed)
 
 🛠 Metadata Editor
 -------------------
@@ -877,25 +1331,29 @@ help_text = """
 📂 Song Browser
 ----------------
 - Browse any folder with MP3s
-- Click a file to view metadata
+- Click a file to view metadata (arrow keys work too; songs around the selection are read ahead in the background, so even huge NAS folders stay snappy)
+- Similar tracks lists the closest matches by tag scores among everything tagged so far (needs "Keep all 50 tag scores")
 - Playback coming soon!
 
 ⚙️ Settings
 ------------
 - Toggle dark mode
 - Reset all settings to default
+- Library Scanning: include subfolders (optionally only a few levels deep) and filter files with patterns like *.mp3 or Live/*; excluded folder names are skipped entirely. Applies to every tab
 
 ❓ Tips
 -------
-- You can stop tagging anytime
+- You can stop tagging anytime (Stop also shuts down every worker process)
 - Short files (less than 3 seconds) are skipped
 - Output and logs go in the /results and /logs folders
 """
 
-help_label = scrolledtext.ScrolledText(tab_help, wrap=tk.WORD, width=85, height=35)
-help_label.pack(padx=20, pady=10)
-help_label.insert(tk.END, help_text)
-help_label.config(state="disabled")
+def build_help_tab():
+    build_header(tab_help, "Help")
+    help_label = scrolledtext.ScrolledText(tab_help, wrap=tk.WORD, width=85, height=35)
+    help_label.pack(padx=20, pady=10)
+    help_label.insert(tk.END, help_text)
+    help_label.config(state="disabled")
 
 about_text = """
 🎵 About Dabbing Genre Tagger
@@ -922,15 +1380,59 @@ musicnn is a deep convolutional neural network trained to detect genre from musi
 📅 Year: 2025
 
 💡 Fun Fact:
-This tool simulates tagging audio in real-time, showing progress as if you were dabbing and listening.
+This tool shows each track's progress live as its windows are tagged, so you can dab along while it listens.
 
 """
 
-about_label = scrolledtext.ScrolledText(tab_about, wrap=tk.WORD, width=85, height=30)
-about_label.pack(padx=20, pady=10)
-about_label.insert(tk.END, about_text)
-about_label.config(state="disabled")
+def build_about_tab():
+    build_header(tab_about, "About")
+    about_label = scrolledtext.ScrolledText(tab_about, wrap=tk.WORD, width=85, height=30)
+    about_label.pack(padx=20, pady=10)
+    about_label.insert(tk.END, about_text)
+    about_label.config(state="disabled")
+
+# ========================
+# Lazy Tab Building
+# ========================
+pending_tabs = {
+    str(tab_renamer): build_renamer_tab,
+    str(tab_metadata): build_metadata_tab,
+    str(tab_browser): build_browser_tab,
+    str(tab_help): build_help_tab,
+    str(tab_about): build_about_tab,
+    str(tab_settings): build_settings_tab,
+}
+
+def build_selected_tab(event=None):
+    builder = pending_tabs.pop(tab_control.select(), None)
+    if builder:
+        builder()
+        apply_theme()
+
+tab_control.bind("<<NotebookTabChanged>>", build_selected_tab)
+widgets_done = time.perf_counter()
+
+# ========================
+# Startup Report & Background Warm-up
+# ========================
+def warm_ml_stack():
+    try:
+        seconds = tagger_engine.load_ml_stack()
+    except Exception as e:
+        post_console(f"⚠️ Could not preload TensorFlow/musicnn: {e}")
+        return
+    if seconds:
+        post_console(f"🧠 TensorFlow + musicnn warmed in background in {seconds:.1f}s")
+
+def report_startup():
+    ready = time.perf_counter()
+    update_console(f"⏱️ Startup: imports {imports_done - startup_start:.2f}s, "
+                   f"widgets {widgets_done - imports_done:.2f}s, window ready after {ready - startup_start:.2f}s")
+    threading.Thread(target=warm_ml_stack, daemon=True).start()
 
+root.after(0, report_startup)
+root.after(GUI_POLL_MS, drain_gui_events)
 
-root.protocol("WM_DELETE_WINDOW", lambda: (save_config(), root.destroy()))
-root.mainloop()
\ No newline at end of file
+root.protocol("WM_DELETE_WINDOW", lambda: (save_config(), metadata_cache.close(), root.destroy()))
+if __name__ == "__main__":
+    root.mainloop()
\ No newline at end of file
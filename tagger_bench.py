@@ -0,0 +1,304 @@
+"""
+Performance benchmark for Dabbing Genre Tagger.
+
+Generates synthetic MP3 fixtures (tones and noise of several lengths, always
+the same for the same seed), then times each pipeline stage on its own (scan,
+decode, spectrogram, inference, aggregation, ID3 write, Excel export) and a
+full process_files() run. This is done for every input_length x overlap
+combination in the grid. Throughput (tracks/sec, audio-seconds/sec) and peak
+RSS go into a JSON file, so runs on different hosts or code versions can be
+compared; --compare prints the change against an earlier result file.
+
+    python tagger_bench.py --input-lengths 3 10 --overlaps 0 50 --repeat 3
+    python tagger_bench.py --quick --compare results/benchmarks/bench_20250101_120000.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+import tagger_core
+import tagger_engine
+import tagger_export
+import tagger_id3
+import tagger_scan
+
+BENCH_DIRNAME = "benchmarks"
+FIXTURE_RATE = 22050
+FIXTURE_KINDS = ("tone", "noise")
+DEFAULT_FIXTURE_LENGTHS = (15, 75)           # seconds; 75 s leaves room for 60 s windows
+DEFAULT_INPUT_LENGTHS = (2, 3, 10, 30, 60)   # the GUI's duration range
+DEFAULT_OVERLAPS = (0, 25, 50, 75)           # percent, as in the GUI
+QUICK_INPUT_LENGTHS = (3,)
+QUICK_OVERLAPS = (0, 50)
+STAGES = ("scan", "decode", "spectrogram", "inference", "aggregation", "id3_write", "excel_export")
+
+# ========================
+# Synthetic Fixtures
+# ========================
+
+def _synth(kind, seconds, rng):
+    """Mono float samples in [-1, 1]: a few drifting partials with a pulse, or filtered noise."""
+    t = np.arange(int(seconds * FIXTURE_RATE)) / FIXTURE_RATE
+    if kind == "tone":
+        base = rng.uniform(110, 440)
+        signal = sum(np.sin(2 * np.pi * base * (k + 1) * t * (1 + 0.01 * np.sin(0.2 * t))) / (k + 1)
+                     for k in range(4))
+        signal *= 0.6 + 0.4 * (np.sin(2 * np.pi * rng.uniform(1, 3) * t) > 0)
+    else:
+        signal = np.cumsum(rng.standard_normal(len(t)))  # brown-ish noise
+        signal -= np.convolve(signal, np.ones(512) / 512, mode="same")
+    return 0.8 * signal / max(float(np.abs(signal).max()), 1e-9)
+
+def _encoder():
+    """A function building the command that turns a WAV into an MP3, using ffmpeg or lame from PATH."""
+    if shutil.which("ffmpeg"):
+        return lambda src, dst: ["ffmpeg", "-y", "-loglevel", "error", "-i", src,
+                                 "-codec:a", "libmp3lame", "-b:a", "128k", dst]
+    if shutil.which("lame"):
+        return lambda src, dst: ["lame", "--quiet", "-b", "128", src, dst]
+    raise RuntimeError("Generating MP3 fixtures needs ffmpeg or lame on PATH")
+
+def make_fixtures(folder, lengths=DEFAULT_FIXTURE_LENGTHS, kinds=FIXTURE_KINDS, seed=0):
+    """Write (or reuse) kind_<seconds>s.mp3 fixtures in folder; returns their file names."""
+    os.makedirs(folder, exist_ok=True)
+    names = []
+    encode = None
+    for kind in kinds:
+        for seconds in lengths:
+            name = f"{kind}_{seconds:g}s.mp3"
+            names.append(name)
+            path = os.path.join(folder, name)
+            if os.path.exists(path):
+                continue
+            encode = encode or _encoder()
+            rng = np.random.default_rng([seed, FIXTURE_KINDS.index(kind), int(seconds * 1000)])
+            samples = (_synth(kind, seconds, rng) * 32767).astype("<i2")
+            wav_path = path[:-4] + ".wav"
+            with wave.open(wav_path, "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(FIXTURE_RATE)
+                f.writeframes(samples.tobytes())
+            try:
+                subprocess.run(encode(wav_path, path), check=True)
+            finally:
+                os.remove(wav_path)
+    return names
+
+# ========================
+# Measurements
+# ========================
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of finished child processes, in MB (None if unknown)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None, None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20, None
+    scale = 2 ** 20 if sys.platform == "darwin" else 2 ** 10  # ru_maxrss is bytes on macOS, KB elsewhere
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+class StageTimer:
+    """Seconds per stage, keeping the fastest of the repeats."""
+
+    def __init__(self):
+        self.best = {}
+
+    def time(self, stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        self.best[stage] = min(self.best.get(stage, elapsed), elapsed)
+        return result
+
+def bench_stages(folder, names, lengths, input_length, input_overlap, batch_size, repeat, work_dir):
+    """Time every stage separately over the fixtures that fit one window; returns (stages, tracks, audio_seconds)."""
+    model = tagger_engine.get_model(tagger_engine.DEFAULT_MODEL, input_length)
+    n_frames = model.n_frames
+    hop = tagger_engine.hop_frames(n_frames, input_overlap)
+    usable = [name for name in names if lengths[name] >= input_length]
+    totals = {stage: 0.0 for stage in STAGES}
+
+    timer = StageTimer()
+    for _ in range(repeat):
+        timer.time("scan", lambda: list(tagger_scan.scan(folder)))
+    totals["scan"] = timer.best["scan"]
+
+    results = []
+    for name in usable:
+        timer = StageTimer()
+        path = os.path.join(folder, name)
+        copy = os.path.join(work_dir, name)
+        for attempt in range(repeat):
+            audio = timer.time("decode", tagger_engine.decode_audio, path)
+            windows = timer.time("spectrogram", lambda: tagger_engine.window_spectrogram(
+                tagger_engine.log_mel(audio), n_frames, hop))
+            taggram = timer.time("inference", lambda: np.concatenate(
+                [scores for _, scores in model.iter_scores(windows, batch_size)]))
+
+            def aggregate():
+                scores = taggram.mean(axis=0)
+                return [(model.labels[i], float(scores[i]), model.model) for i in np.argsort(scores)[::-1][:10]]
+            tags = timer.time("aggregation", aggregate)
+
+            shutil.copyfile(path, copy)
+            timer.time("id3_write", lambda: tagger_id3.TrackTags(copy).write_genre(
+                [tag for tag, _, _ in tags[:3]] + [str(attempt)]))
+        for stage in ("decode", "spectrogram", "inference", "aggregation", "id3_write"):
+            totals[stage] += timer.best[stage]
+        results.append((name, tags))
+
+    def export():
+        exporter = tagger_export.ResultExporter(work_dir, ("xlsx",), basename="bench_tags")
+        for name, tags in results:
+            exporter.add(name, tags)
+        exporter.close()
+    timer = StageTimer()
+    for _ in range(repeat):
+        timer.time("excel_export", export)
+    totals["excel_export"] = timer.best["excel_export"]
+    return totals, len(usable), sum(lengths[name] for name in usable)
+
+def bench_pipeline(folder, input_length, input_overlap, batch_size, workers, work_dir):
+    """One full process_files() run over a scratch copy of the fixtures; returns (seconds, summary)."""
+    run_folder = os.path.join(work_dir, "pipeline")
+    shutil.rmtree(run_folder, ignore_errors=True)
+    shutil.copytree(folder, run_folder)
+    start = time.perf_counter()
+    summary = tagger_core.process_files(
+        run_folder, True, True, lambda text: None, lambda *args: None, False, False, input_length,
+        input_overlap=input_overlap, batch_size=batch_size, workers=workers, bypass_cache=True,
+        store_scores=False, data_dir=work_dir, results_dir=work_dir, logs_dir=work_dir)
+    return time.perf_counter() - start, summary
+
+def run_suite(args):
+    fixtures_dir = args.fixtures or os.path.join(tagger_core.DATA_DIR, BENCH_DIRNAME, f"fixtures_seed{args.seed}")
+    names = make_fixtures(fixtures_dir, args.lengths, FIXTURE_KINDS, args.seed)
+    lengths = {name: tagger_id3.TrackTags(os.path.join(fixtures_dir, name)).length for name in names}
+    print(f"🎛️ {len(names)} fixtures in {fixtures_dir}", flush=True)
+
+    setup = time.perf_counter()
+    tagger_engine.load_ml_stack()
+    ml_import = time.perf_counter() - setup
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="tagger_bench_") as work_dir:
+        for input_length in args.input_lengths:
+            for overlap in args.overlaps:
+                input_overlap = overlap / 100.0  # same conversion as the GUI and CLI
+                if not any(length >= input_length for length in lengths.values()):
+                    print(f"⚠️ Skipping {input_length:g}s windows: no fixture is that long", flush=True)
+                    continue
+                load_start = time.perf_counter()
+                tagger_engine.get_model(tagger_engine.DEFAULT_MODEL, input_length)
+                model_setup = time.perf_counter() - load_start
+                stages, tracks, audio_seconds = bench_stages(fixtures_dir, names, lengths, input_length,
+                                                             input_overlap, args.batch_size, args.repeat, work_dir)
+                busy = sum(seconds for stage, seconds in stages.items() if stage != "scan")
+                row = {
+                    "input_length": input_length, "overlap_percent": overlap,
+                    "tracks": tracks, "audio_seconds": round(audio_seconds, 2),
+                    "model_setup_seconds": round(model_setup, 4),
+                    "stages": {stage: round(seconds, 5) for stage, seconds in stages.items()},
+                    "tracks_per_sec": round(tracks / max(busy, 1e-9), 3),
+                    "audio_seconds_per_sec": round(audio_seconds / max(busy, 1e-9), 2),
+                }
+                if not args.no_pipeline:
+                    seconds, summary = bench_pipeline(fixtures_dir, input_length, input_overlap,
+                                                      args.batch_size, args.workers, work_dir)
+                    row["pipeline"] = {
+                        "seconds": round(seconds, 4), "workers": args.workers, "tagged": summary["tagged"],
+                        "failed": summary["failed"], "skipped": summary["skipped"],
+                        "tracks_per_sec": round(summary["tagged"] / max(seconds, 1e-9), 3),
+                        "audio_seconds_per_sec": round(audio_seconds / max(seconds, 1e-9), 2),
+                    }
+                row["peak_rss_mb"], row["peak_rss_children_mb"] = peak_rss_mb()
+                rows.append(row)
+                print(f"⏱️ {input_length:g}s / {overlap}%: {row['tracks_per_sec']} tracks/sec, "
+                      f"{row['audio_seconds_per_sec']} audio-sec/sec, peak RSS {row['peak_rss_mb'] or 0:.0f} MB", flush=True)
+
+    return {
+        "host": {"node": platform.node(), "platform": platform.platform(), "python": platform.python_version(),
+                 "cpus": os.cpu_count(), "numpy": np.__version__,
+                 "tensorflow": getattr(tagger_engine.tf, "__version__", None),
+                 "librosa": getattr(tagger_engine.librosa, "__version__", None)},
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"model": tagger_engine.DEFAULT_MODEL, "batch_size": args.batch_size, "workers": args.workers,
+                     "repeat": args.repeat, "seed": args.seed},
+        "ml_import_seconds": round(ml_import, 3),
+        "fixtures": [{"name": name, "seconds": round(lengths[name], 2)} for name in names],
+        "results": rows,
+    }
+
+def compare(old, new):
+    """Lines describing how each grid point's stages and throughput moved between two result files."""
+    before = {(row["input_length"], row["overlap_percent"]): row for row in old["results"]}
+    lines = []
+    for row in new["results"]:
+        base = before.get((row["input_length"], row["overlap_percent"]))
+        if base is None:
+            continue
+        changes = []
+        for stage in STAGES:
+            a, b = base["stages"].get(stage), row["stages"].get(stage)
+            if a and b is not None:
+                changes.append(f"{stage} {100.0 * (b - a) / a:+.0f}%")
+        a, b = base["tracks_per_sec"], row["tracks_per_sec"]
+        lines.append(f"{row['input_length']:g}s / {row['overlap_percent']}%: tracks/sec {a} → {b} "
+                     f"({100.0 * (b - a) / max(a, 1e-9):+.0f}%); " + ", ".join(changes))
+    return lines
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the tagging pipeline on synthetic audio.")
+    parser.add_argument("--input-lengths", type=float, nargs="+", default=list(DEFAULT_INPUT_LENGTHS),
+                        help="window lengths to try, in seconds (2-60)")
+    parser.add_argument("--overlaps", type=int, nargs="+", default=list(DEFAULT_OVERLAPS),
+                        help="overlaps to try, in percent (0-75)")
+    parser.add_argument("--quick", action="store_true", help="a small grid for a fast sanity check")
+    parser.add_argument("--lengths", type=float, nargs="+", default=list(DEFAULT_FIXTURE_LENGTHS),
+                        help="fixture lengths to generate, in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="fixture seed; the same seed gives the same audio")
+    parser.add_argument("--fixtures", help="folder for the fixtures (default: data/benchmarks/fixtures_seed<seed>)")
+    parser.add_argument("--batch-size", type=int, default=tagger_engine.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the full pipeline run")
+    parser.add_argument("--repeat", type=int, default=1, help="time each stage this many times and keep the fastest")
+    parser.add_argument("--no-pipeline", action="store_true", help="only time the stages, skip the full process_files run")
+    parser.add_argument("--output", help="result JSON (default: results/benchmarks/bench_<time>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="print the change against an earlier result file")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.quick:
+        args.input_lengths, args.overlaps = list(QUICK_INPUT_LENGTHS), list(QUICK_OVERLAPS)
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(errors="replace")
+    result = run_suite(args)
+    output = args.output or os.path.join(tagger_core.RESULTS_DIR, BENCH_DIRNAME,
+                                         time.strftime("bench_%Y%m%d_%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"💾 Results written to {output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for line in compare(baseline, result):
+            print(f"📊 {line}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Song Browser helpers for Dabbing Genre Tagger.
+
+VirtualListbox only hands Tk the rows that are on screen, so a folder of 100k
+songs costs the same to show as a folder of 20. MetadataCache reads ID3 fields
+on a small thread pool, keeps an LRU of parsed results keyed by path + mtime,
+and prefetches the songs around the selection so arrow-key browsing never
+waits on the NAS.
+"""
+import collections
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tkinter as tk
+from mutagen.easyid3 import EasyID3
+from mutagen.mp3 import MP3
+
+DEFAULT_CACHE_ENTRIES = 4096
+PREFETCH_RADIUS = 10  # songs above and below the selection to read ahead
+
+# ========================
+# Metadata Cache
+# ========================
+
+def read_metadata(path):
+    """The ID3 fields the Song Browser shows, plus the length in seconds."""
+    audio = MP3(path, ID3=EasyID3)
+    fields = {key: audio.get(key, [""])[0]
+              for key in ("artist", "albumartist", "album", "date", "organization", "copyright", "genre")}
+    fields["length"] = audio.info.length
+    return fields
+
+class MetadataCache:
+    """
+    Parsed metadata per file, read on a thread pool and kept in an LRU keyed by path + mtime,
+    so an edited file is re-read while unchanged ones come straight from memory.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, workers=4):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()  # path -> (mtime_ns, size, metadata or exception)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metadata")
+        self._pending = set()
+
+    def peek(self, path):
+        """Cached metadata (or the exception reading it raised) without checking the file; None if unknown."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            self._entries.move_to_end(path)
+            return entry[2]
+
+    def _load(self, path):
+        """Stat the file and parse it unless the cached entry is still current (pool thread)."""
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            return e
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(path)
+                return entry[2]
+        try:
+            metadata = read_metadata(path)
+        except Exception as e:
+            metadata = e
+        with self._lock:
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, metadata)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return metadata
+
+    def request(self, path, callback):
+        """Load path in the background and call callback(path, metadata) from the pool thread."""
+        future = self._pool.submit(self._load, path)
+        future.add_done_callback(lambda f: callback(path, f.result()))
+
+    def prefetch(self, paths):
+        """Warm the cache for paths that are not in it yet."""
+        for path in paths:
+            with self._lock:
+                if path in self._entries or path in self._pending:
+                    continue
+                self._pending.add(path)
+            self._pool.submit(self._prefetch_one, path)
+
+    def _prefetch_one(self, path):
+        try:
+            self._load(path)
+        finally:
+            with self._lock:
+                self._pending.discard(path)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+# ========================
+# Virtual List Widget
+# ========================
+
+class VirtualListbox(tk.Frame):
+    """
+    A Listbox look-alike for very long lists: items live in a Python list and only the visible
+    window of rows is inserted into the real Listbox. on_select(index) fires on click or keys.
+    """
+
+    def __init__(self, parent, height=20, width=50, on_select=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.height = height
+        self.on_select = on_select
+        self.items = []
+        self.top = 0
+        self.selected = None
+        self._positions = {}
+        self.listbox = tk.Listbox(self, height=height, width=width, exportselection=False, activestyle="none")
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self._yview)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="left", fill="y")
+        self.listbox.bind("<<ListboxSelect>>", self._on_click)
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll(-1 if e.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda e: self._scroll(-1))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll(1))
+        for key, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", -height), ("<Next>", height)):
+            self.listbox.bind(key, lambda e, step=step: self._move(step))
+        self.listbox.bind("<Home>", lambda e: self._move(-len(self.items)))
+        self.listbox.bind("<End>", lambda e: self._move(len(self.items)))
+
+    def clear(self):
+        self.items = []
+        self._positions = {}
+        self.top = 0
+        self.selected = None
+        self._render()
+
+    def extend(self, items):
+        """Append items; only redraws if some of them land on screen."""
+        start = len(self.items)
+        self.items.extend(items)
+        for i, item in enumerate(items, start):
+            self._positions[item] = i
+        if start < self.top + self.height:
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def get(self, index):
+        return self.items[index]
+
+    def index_of(self, item):
+        """Position of item, or None."""
+        return self._positions.get(item)
+
+    def select(self, index):
+        """Select index, scroll it into view and fire on_select."""
+        if not self.items:
+            return
+        index = max(0, min(index, len(self.items) - 1))
+        self.selected = index
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.height:
+            self.top = index - self.height + 1
+        self._render()
+        if self.on_select is not None:
+            self.on_select(index)
+
+    def visible_range(self):
+        return self.top, min(len(self.items), self.top + self.height)
+
+    def _render(self):
+        self.listbox.delete(0, tk.END)
+        first, last = self.visible_range()
+        if last > first:
+            self.listbox.insert(tk.END, *self.items[first:last])
+        if self.selected is not None and first <= self.selected < last:
+            self.listbox.selection_set(self.selected - first)
+            self.listbox.activate(self.selected - first)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = max(len(self.items), 1)
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + self.height) / total))
+
+    def _set_top(self, top):
+        top = max(0, min(top, len(self.items) - self.height))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _scroll(self, rows):
+        self._set_top(self.top + rows * 3)
+        return "break"
+
+    def _yview(self, *args):
+        if args[0] == "moveto":
+            self._set_top(int(float(args[1]) * len(self.items)))
+        elif args[0] == "scroll":
+            amount = int(args[1]) * (self.height if args[2] == "pages" else 1)
+            self._set_top(self.top + amount)
+
+    def _move(self, step):
+        self.select((self.selected if self.selected is not None else self.top - 1) + step)
+        return "break"
+
+    def _on_click(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            self.select(self.top + selection[0])
@@ -0,0 +1,127 @@
+"""
+Persistent tag-score cache for Dabbing Genre Tagger.
+
+Results are keyed on a hash of the MP3's audio payload with the ID3 tags cut
+off, so the genre tags we write back never invalidate an entry, plus the model
+name and window settings. Unchanged tracks skip inference on later runs.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_MAX_MB = 256
+CACHE_FILENAME = "tag_cache.sqlite"
+
+def _id3v2_size(header):
+    """Total size of an ID3v2 tag from its 10-byte header, or 0 if there is none."""
+    if len(header) < 10 or header[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in header[6:10]:
+        size = (size << 7) | (byte & 0x7F)  # syncsafe integer
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+def audio_hash(filepath, chunk_size=1 << 20):
+    """Hash the audio frames of an MP3, skipping the ID3v2 header and ID3v1 trailer."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filepath, "rb") as f:
+        f.seek(0, 2)
+        end = f.tell()
+        if end >= 128:
+            f.seek(end - 128)
+            if f.read(3) == b"TAG":
+                end -= 128
+        f.seek(0)
+        start = _id3v2_size(f.read(10))
+        f.seek(start)
+        remaining = max(0, end - start)
+        while remaining:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+def cache_key(content_hash, model, input_length, input_overlap, variant=""):
+    """
+    Cache key for one track under one set of tagging settings.
+    variant names anything that scores only part of the track (early exit, ...); full runs leave it empty.
+    """
+    key = f"{content_hash}:{model}:{float(input_length):g}:{float(input_overlap or 0):g}"
+    return f"{key}:{variant}" if variant else key
+
+class ResultCache:
+    """SQLite store of mean tag scores per track, evicting least-recently-used rows past max_mb."""
+
+    def __init__(self, path, max_mb=DEFAULT_MAX_MB):
+        self.path = path
+        self.max_bytes = int(float(max_mb) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # The decode stage looks entries up and the writer stores them, from different threads
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            scores BLOB NOT NULL,
+            labels TEXT NOT NULL,
+            windows INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._db.commit()
+        self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def get(self, key):
+        """Return (scores, labels, num_windows) for key, or None on a miss."""
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT scores, labels, windows FROM results WHERE key = ?",
+                                       (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+            except sqlite3.Error:
+                return None
+        self.hits += 1
+        return np.frombuffer(row[0], dtype=np.float32), json.loads(row[1]), row[2]
+
+    def put(self, key, scores, labels, num_windows):
+        """Store the mean scores for key and evict old entries if the cache grew past its cap."""
+        blob = np.asarray(scores, dtype=np.float32).tobytes()
+        labels_json = json.dumps(list(labels))
+        size = len(blob) + len(labels_json) + len(key)
+        with self._lock:
+            try:
+                old = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                                 (key, blob, labels_json, int(num_windows), size, time.time()))
+                self.total_bytes += size - (old[0] if old else 0)
+                self._evict()
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self._db.execute("SELECT key, size FROM results ORDER BY last_used LIMIT 256").fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            for key, size in rows:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    return
+
+    def close(self):
+        with self._lock:
+            self._db.close()
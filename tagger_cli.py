@@ -0,0 +1,179 @@
+"""
+Headless batch tagging for Dabbing Genre Tagger.
+
+Runs the same tagging pipeline as the Genre Tagger tab without building the Tk
+GUI, logging to stdout and to a file in LOGS_DIR. Exits non-zero when any track
+fails, so it can run under cron on machines without a display.
+
+    python tagger_cli.py /music/inbox --mode both --duration 3 --overlap 50 --workers 8
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+import tagger_cache
+import tagger_core
+import tagger_engine
+import tagger_features
+import tagger_scan
+
+MODES = {
+    "excel": "Export to Excel only",
+    "tag": "Tag MP3s only",
+    "both": "Tag MP3s & Export to Excel",
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Tag MP3 genres with musicnn, no GUI required.")
+    parser.add_argument("folder", help="folder of MP3s to tag")
+    parser.add_argument("--duration", type=float, default=3, help="length of each audio chunk analyzed, in seconds (2-60)")
+    parser.add_argument("--overlap", type=int, default=50, choices=[0, 25, 50, 75], help="how much chunks overlap, in percent")
+    parser.add_argument("--mode", choices=sorted(MODES), default="both",
+                        help="excel = Excel export only, tag = write ID3 genres only, both = both")
+    parser.add_argument("-r", "--recursive", action="store_true", help="also tag MP3s in subfolders")
+    parser.add_argument("--max-depth", type=int, help="subfolder levels to descend with --recursive (default: no limit)")
+    parser.add_argument("--include", action="append", metavar="PATTERN",
+                        help="only files matching this pattern, e.g. '*.mp3' (repeatable)")
+    parser.add_argument("--exclude", action="append", metavar="PATTERN",
+                        help="skip files and folders matching this pattern (repeatable)")
+    parser.add_argument("--csv", action="store_true", help="also export suno_tags.csv")
+    parser.add_argument("--jsonl", action="store_true", help="also export suno_tags.jsonl")
+    parser.add_argument("--no-score-store", action="store_true", help="don't keep the full score vectors in results/score_store")
+    parser.add_argument("--store-taggrams", action="store_true", help="also keep per-window scores in the score store")
+    parser.add_argument("--top3", action="store_true", help="only keep the top 3 tags")
+    parser.add_argument("--model", action="append", choices=tagger_engine.MODELS,
+                        help=f"model to tag with (default: {tagger_engine.DEFAULT_MODEL}); repeat for an ensemble")
+    parser.add_argument("--ensemble-merge", choices=tagger_engine.ENSEMBLE_MERGES, default="merge",
+                        help="with several models: average shared tags into one ranking, or keep each model's own")
+    parser.add_argument("--output", help="folder for the Excel file (default: the MP3 folder)")
+    parser.add_argument("--batch-size", type=int, default=tagger_engine.DEFAULT_BATCH_SIZE, help="windows per inference batch")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, each with its own model")
+    parser.add_argument("--decode-depth", type=int, default=tagger_engine.DEFAULT_DECODE_DEPTH, help="decoded tracks queued ahead of inference")
+    parser.add_argument("--write-depth", type=int, default=tagger_engine.DEFAULT_WRITE_DEPTH, help="tagged tracks queued ahead of the writer")
+    parser.add_argument("--bypass-cache", action="store_true", help="re-tag every file even if its scores are cached")
+    parser.add_argument("--cache-max-mb", type=float, default=tagger_cache.DEFAULT_MAX_MB, help="result cache size limit")
+    parser.add_argument("--feature-cache", action="store_true",
+                        help="keep decoded spectrograms so runs with other --duration/--overlap skip decoding")
+    parser.add_argument("--feature-cache-max-mb", type=float, default=tagger_features.DEFAULT_MAX_MB,
+                        help="spectrogram cache size limit")
+    parser.add_argument("--early-exit", action="store_true",
+                        help="stop scoring a track once its top 3 tags have converged")
+    parser.add_argument("--early-exit-patience", type=int, default=tagger_engine.DEFAULT_EARLY_EXIT_PATIENCE,
+                        help="batches the top 3 tags must hold still before a track stops early")
+    sample = parser.add_mutually_exclusive_group()
+    sample.add_argument("--sample-count", type=int, metavar="N", help="decode and score only N windows per track")
+    sample.add_argument("--sample-percent", type=float, metavar="P", help="decode and score only P%% of each track's windows")
+    parser.add_argument("--sample-placement", choices=tagger_engine.SAMPLE_PLACEMENTS, default="spread",
+                        help="where sampled windows sit in the track")
+    parser.add_argument("--incremental", action="store_true", help="only tag files that are new or changed since their last run")
+    parser.add_argument("--no-trace", action="store_true", help="don't write per-stage trace spans to logs/")
+    parser.add_argument("--chrome-trace", action="store_true", help="also write the trace as a Chrome trace-event file")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last run if it was interrupted, skipping the files it finished")
+    parser.add_argument("--watch", type=float, metavar="MINUTES",
+                        help="keep running and re-check the folder every MINUTES (implies --incremental)")
+    return parser
+
+class RunLog:
+    """Console output for headless runs: stdout plus a timestamped log file in LOGS_DIR."""
+
+    def __init__(self, logs_dir):
+        self.path = os.path.join(logs_dir, time.strftime("tagging_%Y%m%d_%H%M%S.log"))
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            print(text, flush=True)
+            self._file.write(f"{text}\n")
+            self._file.flush()
+
+    def progress(self, current, total, status=""):
+        self.write(f"📈 {current}/{total} files tagged {status}".rstrip())
+
+    def close(self):
+        self._file.close()
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.folder):
+        print(f"❌ Not a folder: {args.folder}", file=sys.stderr)
+        return 2
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(errors="replace")  # emoji on consoles that can't show them
+
+    # Ctrl+C / SIGTERM stop after the current track, like the Stop button
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    mode = MODES[args.mode]
+    sample_mode, sample_value = "off", tagger_engine.DEFAULT_SAMPLE_COUNT
+    if args.sample_count is not None:
+        sample_mode, sample_value = "count", args.sample_count
+    elif args.sample_percent is not None:
+        sample_mode, sample_value = "percent", args.sample_percent
+    log = RunLog(tagger_core.LOGS_DIR)
+    log.write(f"📝 Logging to {log.path}")
+    exit_code = 0
+    resume = args.resume
+    try:
+        while True:
+            summary = tagger_core.process_files(
+                args.folder,
+                mode in ("Tag MP3s only", "Tag MP3s & Export to Excel"),
+                mode in ("Export to Excel only", "Tag MP3s & Export to Excel"),
+                log.write, log.progress, args.top3, mode == "Export to Excel only",
+                args.duration, args.output, args.overlap / 100.0,
+                batch_size=args.batch_size,
+                workers=args.workers,
+                decode_depth=args.decode_depth,
+                write_depth=args.write_depth,
+                bypass_cache=args.bypass_cache,
+                cache_max_mb=args.cache_max_mb,
+                models=tuple(dict.fromkeys(args.model or [tagger_engine.DEFAULT_MODEL])),
+                ensemble_merge=args.ensemble_merge,
+                feature_cache=args.feature_cache,
+                feature_cache_max_mb=args.feature_cache_max_mb,
+                incremental=args.incremental or args.watch is not None,
+                settle_seconds=30 if args.watch is not None else 0,
+                early_exit=args.early_exit,
+                early_exit_patience=args.early_exit_patience,
+                sample_mode=sample_mode,
+                sample_value=sample_value,
+                sample_placement=args.sample_placement,
+                recursive=args.recursive,
+                include=tuple(args.include or tagger_scan.DEFAULT_INCLUDE),
+                exclude=tuple(args.exclude or ()),
+                max_depth=args.max_depth,
+                export_formats=("xlsx",) + (("csv",) if args.csv else ()) + (("jsonl",) if args.jsonl else ()),
+                store_scores=not args.no_score_store,
+                store_taggrams=args.store_taggrams,
+                resume=resume,
+                trace=not args.no_trace,
+                chrome_trace=args.chrome_trace,
+                should_stop=stop_event.is_set,
+            )
+            resume = False
+            if summary["aborted"]:
+                exit_code = 1
+            elif summary["failed"]:
+                log.write(f"❌ {summary['failed']} file(s) failed")
+                exit_code = 1
+            if summary["stopped"] or summary["aborted"] or args.watch is None:
+                break
+            log.write(f"👀 Watching {args.folder}, next check in {args.watch:g} min")
+            if stop_event.wait(args.watch * 60):
+                break
+        if stop_event.is_set():
+            exit_code = 130
+    finally:
+        log.close()
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,615 @@
+"""
+Headless tagging pipeline for Dabbing Genre Tagger.
+
+process_files() drives a whole tagging run (scan, cache/sync checks, inference,
+ID3 writes, Excel export) without importing Tk, so the same code runs behind the
+GUI and from tagger_cli.py on machines without a display.
+"""
+import contextlib
+import json
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+
+import tagger_cache
+import tagger_engine
+import tagger_export
+import tagger_features
+import tagger_id3
+import tagger_journal
+import tagger_scan
+import tagger_store
+import tagger_sync
+import tagger_trace
+
+# ========================
+# Directory Setup
+# ========================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SONGS_DIR = os.path.join(BASE_DIR, "songs")
+RESULTS_DIR = os.path.join(BASE_DIR, "results")
+LOGS_DIR = os.path.join(BASE_DIR, "logs")
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# Ensure directories exist, Create folders if they don't exist
+for folder in [SONGS_DIR, RESULTS_DIR,LOGS_DIR, DATA_DIR]:
+    os.makedirs(folder, exist_ok=True)
+
+# ========================
+# Tagging Engine Logic
+# ========================
+
+GENRE_TAGS = 3  # tags written to the ID3 genre
+
+def process_files(folder_path, do_genre, do_excel, gui_update_fn, update_progress_fn, top_tags_only, excel_only, input_length, custom_excel_folder=None, input_overlap=0.5,
+                  batch_size=tagger_engine.DEFAULT_BATCH_SIZE, workers=1,
+                  decode_depth=tagger_engine.DEFAULT_DECODE_DEPTH, write_depth=tagger_engine.DEFAULT_WRITE_DEPTH,
+                  bypass_cache=False, cache_max_mb=tagger_cache.DEFAULT_MAX_MB, incremental=False, settle_seconds=0,
+                  feature_cache=False, feature_cache_max_mb=tagger_features.DEFAULT_MAX_MB,
+                  models=(tagger_engine.DEFAULT_MODEL,), ensemble_merge="merge",
+                  early_exit=False, early_exit_patience=tagger_engine.DEFAULT_EARLY_EXIT_PATIENCE,
+                  sample_mode="off", sample_value=tagger_engine.DEFAULT_SAMPLE_COUNT, sample_placement="spread",
+                  recursive=False, include=tagger_scan.DEFAULT_INCLUDE, exclude=(), max_depth=None,
+                  export_formats=("xlsx",), store_scores=True, store_taggrams=False,
+                  resume=False, trace=True, chrome_trace=False, should_stop=lambda: False, track_status_fn=None, track_progress_fn=None, done_fn=None,
+                  data_dir=DATA_DIR, results_dir=RESULTS_DIR, logs_dir=LOGS_DIR):
+    """
+    Process MP3 files in the selected folder and tag them using musicnn.
+    This function supports tagging, genre metadata writing, and Excel export.
+    With do_excel, each track's tags are appended to the export_formats files (xlsx, csv, jsonl)
+    as soon as it is done, so a stopped or crashed run keeps what it tagged.
+    With store_scores, every track's full mean score vector (and with store_taggrams its per-window
+    scores) is kept in the memory-mapped score store under RESULTS_DIR.
+    Files stream in from a LibraryScanner (recursive / include / exclude / max_depth), so tagging
+    starts on the first file found while the rest of the folder is still being walked.
+    Windows from consecutive tracks are packed into shared inference batches of batch_size.
+    With workers > 1, inference runs in that many processes while this thread writes the results.
+    Decoding runs up to decode_depth tracks ahead of inference, and inference up to write_depth
+    tracks ahead of the tag writer, each stage in its own thread.
+    With more than one of models, each track is decoded once and every batch of windows is run through
+    all of them; ensemble_merge "merge" averages the scores of tags the models share into one ranking,
+    "separate" keeps each model's own top tags. Exports and ID3 (TXXX:GENRE_MODELS) name the model
+    behind every tag.
+    Scores are cached per audio content and settings; unchanged tracks skip inference unless bypass_cache.
+    With incremental, files unchanged since their last run (per the library manifest) are not even opened.
+    With feature_cache, each track's log-mel spectrogram is kept on disk (up to feature_cache_max_mb) so
+    re-tagging with a different input_length / input_overlap windows the cached one instead of decoding.
+    With early_exit, each track's windows are scored in spread order and inference stops once its
+    top-3 tags have held still for early_exit_patience batches.
+    With a sample_mode of "count" or "percent", only sample_value windows (or percent of them) placed
+    per sample_placement are decoded and scored, seeking past the rest of the track.
+    Every run keeps a journal of finished files in data_dir. With resume, an unfinished last run with
+    the same settings is continued: its results are put back into the export and only the files it
+    never finished (or that failed) are tagged. A resume with different settings is refused (aborted)
+    and the journal kept.
+    With trace, every file's open / decode / inference / aggregate / id3 / export spans are written to
+    logs_dir as JSON lines (and as a Chrome trace with chrome_trace), and the run ends with per-stage
+    percentiles and the slowest files.
+
+    Nothing here touches Tk: progress goes through gui_update_fn / update_progress_fn and the optional
+    track_status_fn(text), track_progress_fn(done, total) and done_fn() hooks, and should_stop() is
+    polled to cancel, between inference batches too. track_progress_fn follows the windows actually
+    scored, batch by batch, from whichever thread runs inference.
+    Returns a summary dict with tagged/failed/skipped counts, stopped/aborted flags and worker_errors
+    (problems of worker processes that failed or crashed; the tracks they held count as failed).
+    """
+    track_status_fn = track_status_fn or (lambda text: None)
+    exporter = None
+    if do_excel:
+        exporter = tagger_export.ResultExporter(custom_excel_folder or folder_path, export_formats, gui_update_fn)
+    files = []  # paths relative to folder_path, appended as the scanner finds them
+    scanner = tagger_scan.LibraryScanner(folder_path, recursive, include, exclude, max_depth)
+    start_time = time.time()
+    input_length = float(input_length)
+    early_exit_rule = tagger_engine.EarlyExit(early_exit_patience) if early_exit else None
+    sampling = tagger_engine.Sampling(sample_mode, sample_value, sample_placement) if sample_mode != "off" else None
+    model_name = tagger_engine.ensemble_name(models)
+    variant = "+".join(part for part in (f"early{early_exit_rule.patience}" if early_exit_rule else "",
+                                         sampling.variant() if sampling else "") if part)
+
+    # Only new or changed files when syncing incrementally
+    manifest = None
+    up_to_date = 0
+    if incremental:
+        manifest = tagger_sync.LibraryManifest(os.path.join(data_dir, tagger_sync.MANIFEST_FILENAME))
+        sync_settings = tagger_sync.settings_key(model_name, input_length, input_overlap,
+                                                 do_genre and not excel_only, variant)
+
+    # Journal of finished files, continued when resuming an interrupted run with the same settings
+    journal_path = os.path.join(data_dir, tagger_journal.JOURNAL_FILENAME)
+    run_settings = json.loads(json.dumps({
+        "folder_path": os.path.abspath(folder_path), "input_length": input_length, "input_overlap": input_overlap,
+        "variant": variant, "models": list(models), "ensemble_merge": ensemble_merge, "do_genre": do_genre, "do_excel": do_excel, "excel_only": excel_only,
+        "top_tags_only": top_tags_only, "export_folder": custom_excel_folder or folder_path,
+        "export_formats": list(export_formats), "recursive": recursive, "include": list(include),
+        "exclude": list(exclude), "max_depth": max_depth}))
+    last_run = tagger_journal.load_last_run(journal_path) if resume else None
+    if resume and (last_run is None or last_run.finished):
+        gui_update_fn("ℹ️ No unfinished run to resume, starting a new one")
+        last_run = None
+    elif last_run is not None and last_run.settings != run_settings:
+        # Starting over would wipe the journal; leave it for a resume with the right settings
+        changed = sorted(key for key in set(last_run.settings) | set(run_settings)
+                         if last_run.settings.get(key) != run_settings.get(key))
+        gui_update_fn(f"❌ Can't resume: the last run used different settings ({', '.join(changed)}). "
+                      "Switch back to its settings to resume it, or start a new run instead.")
+        track_status_fn("")
+        return {"total": 0, "tagged": 0, "failed": 0, "skipped": 0, "up_to_date": 0, "resumed": 0,
+                "windows_scored": 0, "windows_total": 0, "genres_written": 0, "bytes_rewritten": 0,
+                "trace": None, "worker_errors": [], "stopped": False, "aborted": True}
+    journal = None
+    try:
+        journal = tagger_journal.RunJournal(journal_path, run_settings, resume=last_run is not None)
+    except Exception as e:
+        gui_update_fn(f"⚠️ Run journal unavailable, this run can't be resumed later: {e}")
+    resumed = set()
+    if last_run is not None:
+        resumed = last_run.done
+        if exporter is not None:
+            for filename, tags in last_run.tagged():
+                exporter.add(filename, tags)
+        gui_update_fn(f"⏯️ Resuming the last run: {len(resumed)} files already done"
+                      + (f", {exporter.rows} results restored to the export" if exporter is not None else ""))
+
+    def journal_record(filename, status, tags=None):
+        if journal is not None:
+            journal.record(filename, status, tags)
+
+    gui_update_fn(f"🔎 Scanning {folder_path}" + (" and its subfolders" if recursive else ""))
+    setup_time = 0.0
+    inference_time = 0.0
+    tracks_done = 0
+    windows_scored = 0
+    windows_total = 0
+    decoded_seconds = 0.0
+    audio_seconds = 0.0
+    handled = 0
+    failed = 0
+    skipped = 0
+    run_failed = False
+    worker_errors = []
+    waits = tagger_engine.StageWaits()
+    id3_stats = tagger_id3.WriteStats()
+    write_tags = do_genre and not excel_only
+    parsed = {}  # job key -> TrackTags from the length check, reused for the genre write
+    try:
+        cache = tagger_cache.ResultCache(os.path.join(data_dir, tagger_cache.CACHE_FILENAME), cache_max_mb)
+    except Exception as e:
+        gui_update_fn(f"⚠️ Result cache unavailable, tagging everything: {e}")
+        cache = None
+
+    features = None
+    if feature_cache:
+        features = tagger_features.FeatureCache(os.path.join(data_dir, tagger_features.FEATURES_DIRNAME),
+                                                feature_cache_max_mb)
+    feature_hits = 0
+    feature_misses = 0
+
+    store = None
+    if store_scores:
+        try:
+            store = tagger_store.ScoreStore(os.path.join(results_dir, tagger_store.STORE_DIRNAME), model_name,
+                                            tagger_engine.model_labels(model_name), keep_taggrams=store_taggrams)
+        except Exception as e:
+            gui_update_fn(f"⚠️ Score store unavailable, keeping only the top tags: {e}")
+
+    tracer = None
+    if trace:
+        try:
+            tracer = tagger_trace.Tracer(logs_dir, chrome_trace)
+        except Exception as e:
+            gui_update_fn(f"⚠️ Tracing unavailable: {e}")
+
+    def span(stage, filename, **attrs):
+        return tracer.span(stage, filename, **attrs) if tracer is not None else contextlib.nullcontext()
+
+    def scanned_files():
+        """Files to tag, straight from the scanner; unchanged ones are counted and dropped when syncing."""
+        nonlocal up_to_date
+        names = (name for name in scanner if name not in resumed) if resumed else scanner
+        if manifest is None:
+            yield from names
+            return
+        for filename, current in tagger_sync.iter_changed(folder_path, names, manifest, sync_settings, settle_seconds):
+            if current:
+                up_to_date += 1
+            else:
+                yield filename
+
+    def running_total():
+        """Files queued so far; a trailing + while the scan is still finding more."""
+        return f"{len(files)}" if scanner.done else f"{len(files)}+"
+
+    def queue_jobs():
+        """Check each MP3 before it is decoded; files that can't be tagged pass through as skips."""
+        for filename in scanned_files():
+            if should_stop():
+                return
+            files.append(filename)
+            job = tagger_engine.TagJob(len(files) - 1, os.path.join(folder_path, filename))
+            # File open: ID3 parse, length check and cache lookup
+            with span("open", filename):
+                try:
+                    # Load audio metadata; the same parse writes the genre later
+                    track = tagger_id3.TrackTags(job.filepath)
+
+                    # Skip files that are too short
+                    if track.length < 3.0:
+                        job.skip = f"⚠️ Skipping {filename} – too short ({track.length:.2f}s)"
+                    elif track.length < input_length:
+                        job.skip = f"⚠️ Skipping {filename} – shorter than input window ({track.length:.2f}s)"
+                    if write_tags and job.skip is None:
+                        parsed[job.key] = track
+
+                    # Tracks tagged before with the same audio and settings skip inference
+                    if job.skip is None and (cache is not None or features is not None):
+                        job.content_hash = tagger_cache.audio_hash(job.filepath)
+                    if job.skip is None and cache is not None:
+                        job.cache_key = tagger_cache.cache_key(job.content_hash, model_name,
+                                                               input_length, input_overlap, variant)
+                        hit = None if bypass_cache else cache.get(job.cache_key)
+                        if hit is not None:
+                            job.scores, job.labels, job.num_windows = hit
+                    # Only set once every check passed: a skip with a length is a file that is really too short
+                    job.length = track.length
+                except Exception as e:
+                    job.skip = f"❌ Error tagging {filename}: {e}"
+            yield job
+
+    progress_key = None
+
+    def report_progress(key, done, total):
+        """Per-track progress straight from the inference batches."""
+        nonlocal progress_key
+        if key != progress_key:
+            progress_key = key
+            track_status_fn(f"Now tagging: {files[key]}")
+        if track_progress_fn is not None:
+            track_progress_fn(done, total)
+
+    def tagged_jobs():
+        """Jobs coming back from the warm model in this process or from the worker pool."""
+        nonlocal setup_time, run_failed, waits
+        try:
+            setup_start = time.time()
+            if workers > 1:
+                gui_update_fn(f"🧠 Starting {workers} tagging workers, each with its own {model_name} model")
+                pool = tagger_engine.WorkerPool(workers, model_name, input_length, input_overlap,
+                                                batch_size, decode_depth, early_exit_rule, sampling, features)
+                waits = pool.waits
+            else:
+                # Load the model once and reuse the warm session for every track
+                model = tagger_engine.get_model(model_name, input_length)
+                setup_time = time.time() - setup_start
+                gui_update_fn(f"🧠 {model.model} ready in {setup_time:.2f}s (loaded once, reused for every track)")
+        except Exception as e:
+            gui_update_fn(f"❌ Could not load the {model_name} model: {e}")
+            run_failed = True
+            return
+        gui_update_fn(f"🧪 Using input window: {input_length}s with {int(input_overlap * 100)}% overlap, batches of {batch_size} windows")
+        if early_exit_rule:
+            gui_update_fn(f"🎯 Early exit: stop a track once its top 3 tags hold still for {early_exit_rule.patience} batches")
+        if sampling:
+            amount = f"{sampling.value:g}%" if sampling.mode == "percent" else f"{sampling.value:g}"
+            gui_update_fn(f"🎚️ Sampling: decoding only {amount} windows per track, placed {sampling.placement}")
+
+        if workers <= 1:
+            # decode → inference → write, each stage running ahead of the next through a bounded queue
+            hop = tagger_engine.hop_frames(model.n_frames, input_overlap)
+            decoded = tagger_engine.run_ahead(tagger_engine.decode_jobs(queue_jobs(), model.n_frames, hop, sampling, features),
+                                              decode_depth, waits, "decode", "inference")
+            tagged = tagger_engine.run_ahead(model.tag_stream(decoded, batch_size, report_progress, should_stop, early_exit_rule),
+                                             write_depth, waits, "inference", "write")
+            try:
+                yield from tagged
+            finally:
+                # Waits for the inference thread to stop, so decoded is no longer running anywhere
+                tagged.close()
+                decoded.close()
+            return
+        try:
+            yield from pool.run(queue_jobs(), should_stop=should_stop, on_progress=report_progress)
+            # Some workers failed but others carried on; their lost tracks come back as failures
+            for error in pool.errors:
+                gui_update_fn(f"⚠️ Tagging worker problem: {error}")
+        except RuntimeError as e:
+            gui_update_fn(f"❌ {e}")
+            run_failed = True
+        finally:
+            if should_stop():
+                pool.cancel()
+            pool.close()
+            setup_time = max(pool.setup_times, default=0.0)
+            worker_errors.extend(pool.errors)
+
+    results = tagged_jobs()
+    completed = False
+    try:
+        for job in results:
+            if should_stop():
+                break
+
+            handled += 1
+            i = job.key
+            filename = files[i]
+            filepath = job.filepath
+            track = parsed.pop(i, None)
+            gui_update_fn(f"\n🎵 [{i+1}/{running_total()}] Tagging: {filename}")
+            if job.feature_hit is not None:
+                feature_hits += job.feature_hit
+                feature_misses += not job.feature_hit
+            if tracer is not None:
+                # Decode and inference ran in other threads (or processes); their timings ride on the job
+                if "decode_at" in job.timings:
+                    attrs = {"error": job.error} if job.error else {}
+                    if job.feature_hit:
+                        attrs["cached"] = True
+                    tracer.add("decode", job.timings["decode_at"], job.timings["decode"], filename, **attrs)
+                if "inference_at" in job.timings:
+                    tracer.add("inference", job.timings["inference_at"], job.timings["inference"], filename,
+                               windows=job.num_windows,
+                               wall=round(job.timings["inference_end"] - job.timings["inference_at"], 6))
+            if job.taggram is None:
+                track_status_fn(f"Now tagging: {filename}")  # never reached inference, so no batch progress
+
+            if job.skip is not None:
+                gui_update_fn(job.skip)
+                if job.length is None:
+                    # Could not be opened or checked: a failure, tried again next time
+                    failed += 1
+                    journal_record(filename, "failed")
+                    continue
+                skipped += 1
+                journal_record(filename, "skipped")
+                # Too-short files stay too short until they change; don't re-check them every sync
+                if manifest is not None:
+                    manifest.record(filepath, sync_settings)
+                continue
+
+            try:
+                try:
+                    if job.error is not None:
+                        raise RuntimeError(job.error)
+                    tag_scores_raw, tag_names = job.taggram, job.labels
+
+                    if tag_scores_raw is None:
+                        # Same audio and settings were tagged before: skip straight to the top tags
+                        gui_update_fn(f"♻️ Cache hit – reusing scores from {job.num_windows} windows tagged earlier with these settings")
+                        tag_scores = job.scores
+                    else:
+                        inference_time += job.timings["inference"]
+
+                        # Print elapsed time
+                        track_elapsed = job.timings["decode"] + job.timings["inference"]
+                        gui_update_fn(f"🕒 Time spent tagging this track: {track_elapsed:.2f}s "
+                                      f"(decode {job.timings['decode']:.2f}s, inference {job.timings['inference']:.2f}s)")
+
+                        # Show processed duration and chunk count
+                        num_windows = tag_scores_raw.shape[0]
+                        windows_scored += num_windows
+                        windows_total += job.total_windows or num_windows
+                        total_processed = num_windows * input_length
+                        capped_total = min(job.length, total_processed)
+                        gui_update_fn(f"📊 Processed with {num_windows} overlapping windows of {input_length:.1f}s each")
+                        if job.total_windows and num_windows < job.total_windows:
+                            gui_update_fn(f"🎯 Scored {num_windows} of the track's {job.total_windows} windows")
+                        gui_update_fn(f"📊 Total processed: ~{capped_total:.1f}s (track length: {job.length:.1f}s)")
+                        if sampling and job.decoded_seconds is not None:
+                            decoded_seconds += job.decoded_seconds
+                            audio_seconds += job.length
+                            gui_update_fn(f"🎚️ Decoded {job.decoded_seconds:.1f}s of {job.length:.1f}s "
+                                          f"({100.0 * job.decoded_seconds / max(job.length, 1e-9):.0f}% of the track)")
+
+                        # Average over all tag scores (already done by the engine as batches finished)
+                        tag_scores = job.scores
+
+                    # Safety check on result shape
+                    if not isinstance(tag_scores, np.ndarray) or len(tag_scores) != len(tag_names):
+                        gui_update_fn(f"⚠️ Skipping {filename} due to tag length mismatch")
+                        failed += 1
+                        journal_record(filename, "failed")
+                        continue
+
+                    # Remember fresh scores so this track skips inference next time
+                    if tag_scores_raw is not None and job.cache_key is not None:
+                        cache.put(job.cache_key, tag_scores, tag_names, num_windows)
+
+                except Exception as e:
+                    gui_update_fn(f"❌ Error extracting tags from {filename}: {e}")
+                    failed += 1
+                    journal_record(filename, "failed")
+                    continue
+
+                # The tags are good even if the score store can't take them (disk full, memmap in use)
+                if store is not None:
+                    try:
+                        store.put(filepath, tag_scores, job.num_windows, tag_scores_raw, variant)
+                    except Exception as e:
+                        gui_update_fn(f"⚠️ Could not keep {filename}'s full scores in the score store: {e}")
+
+                with span("aggregate", filename):
+                    # Sort and keep top tags (per model when an ensemble keeps them separate)
+                    rankings = []
+                    for ranking in ranked_tags(tag_scores, tag_names, model_name, ensemble_merge):
+                        ranking_tags = []
+                        for tag, score, source in ranking[:10]:
+                            try:
+                                ranking_tags.append((tag, float(score), source))
+                            except (ValueError, TypeError):
+                                gui_update_fn(f"⚠️ Skipping invalid score: {tag} = {score}")
+                        rankings.append(ranking_tags[:3] if top_tags_only else ranking_tags)
+                    tags = [entry for ranking_tags in rankings for entry in ranking_tags]
+
+                    # Format tag text and store results; ⭐ marks the tags that go into the genre
+                    genre, starred = genre_tags(rankings)
+                    top3 = [tag for tag, _ in genre]
+                    top3_models = [source for _, source in genre]
+                    tag_text = "\n".join([
+                        (f"⭐ {tag} ({score:.2f})" if (r, idx) in starred else f"• {tag} ({score:.2f})")
+                        + (f" [{source}]" if len(models) > 1 else "")
+                        for r, ranking_tags in enumerate(rankings)
+                        for idx, (tag, score, source) in enumerate(ranking_tags)
+                    ])
+                gui_update_fn(tag_text)
+                if exporter is not None:
+                    with span("export", filename):
+                        exporter.add(filename, tags)
+
+                # Update MP3 metadata with top tags
+                genre_written = True
+                if write_tags:
+                    try:
+                        with span("id3", filename):
+                            written, nbytes, in_place = (track or tagger_id3.TrackTags(filepath)).write_genre(top3, top3_models)
+                        id3_stats.add(written, nbytes, in_place)
+                        gui_update_fn(f"✅ Genre updated: {top3}" if written else f"✅ Genre already up to date: {top3}")
+                    except Exception as e:
+                        gui_update_fn(f"⚠️ Error writing to {filename}: {e}")
+                        genre_written = False
+                        failed += 1
+
+                # Recorded after the genre write so our own change doesn't count as a new edit
+                if manifest is not None and genre_written:
+                    manifest.record(filepath, sync_settings)
+                # A failed genre write is retried on resume; the export gets its row again then
+                journal_record(filename, "tagged" if genre_written else "failed", tags)
+
+            except Exception as e:
+                gui_update_fn(f"❌ Error tagging {filename}: {e}")
+                failed += 1
+                journal_record(filename, "failed")
+                continue
+
+            # Update overall progress; a track whose genre write failed already counts as failed
+            if genre_written:
+                tracks_done += 1
+            elapsed = time.time() - start_time
+            if scanner.done:
+                avg_time = elapsed / handled
+                est_remaining = avg_time * (len(files) - handled)
+                mins, secs = divmod(est_remaining, 60)
+                eta = f"⏱️ Est. time left: {int(mins):02d}:{int(secs):02d}"
+            else:
+                eta = f"🔎 Still scanning, {scanner.count} files found"
+            update_progress_fn(handled, len(files), f"{eta} · {tracks_done / elapsed:.2f} tracks/sec")
+        completed = True
+    finally:
+        # Runs on errors too, so caches, the journal and the export are always closed properly
+        results.close()
+        if tracer is not None:
+            tracer.close()
+        if journal is not None:
+            if completed and not run_failed and not should_stop():
+                journal.finish()
+            journal.close()
+        if cache is not None:
+            cache.close()
+        if features is not None:
+            features.close()
+        if store is not None:
+            store.close()
+        if manifest is not None:
+            manifest.save()
+        for folder, error in scanner.errors:
+            gui_update_fn(f"⚠️ Could not read folder {folder}: {error}")
+        # Whatever was tagged gets exported, even when the run was stopped or aborted
+        if exporter is not None and exporter.rows:
+            try:
+                exporter.close()
+                gui_update_fn(f"💾 Exported {exporter.rows} tracks to {', '.join(exporter.paths)}")
+            except Exception as e:
+                gui_update_fn(f"❌ Error finishing the export: {e}")
+
+    summary = {"total": len(files), "tagged": tracks_done, "failed": failed, "skipped": skipped,
+               "up_to_date": up_to_date, "resumed": len(resumed), "windows_scored": windows_scored, "windows_total": windows_total,
+               "genres_written": id3_stats.written, "bytes_rewritten": id3_stats.bytes_rewritten,
+               "trace": tracer.summary_path if tracer is not None else None, "worker_errors": worker_errors,
+               "stopped": False, "aborted": run_failed}
+    if run_failed:
+        track_status_fn("")
+        return summary
+
+    if should_stop():
+        elapsed = time.time() - start_time
+        mins, secs = divmod(int(elapsed), 60)
+        track_status_fn("⛔ Stopped")
+        gui_update_fn(f"🚩 Stopped. Total time spent: {mins:02}:{secs:02}")
+        summary["stopped"] = True
+        return summary
+
+    total = time.time() - start_time
+    gui_update_fn(f"🧠 Model setup: {setup_time:.2f}s once per {'worker' if workers > 1 else 'run'}, inference: {inference_time:.2f}s across all tracks")
+    gui_update_fn(f"⚡ Throughput: {tracks_done / max(total, 1e-9):.2f} tracks/sec with batches of {batch_size} windows on {workers} worker(s)")
+    for line in waits.report():
+        gui_update_fn(f"🚦 {line}")
+    if tracer is not None:
+        for line in tracer.report():
+            gui_update_fn(f"📐 {line}")
+        gui_update_fn(f"🧾 Trace written to {tracer.path}" + (f" and {tracer.chrome_path}" if tracer.chrome_path else ""))
+    if (early_exit_rule or sampling) and windows_total:
+        gui_update_fn(f"🎯 Scored {windows_scored} of {windows_total} windows "
+                      f"({100.0 * windows_scored / windows_total:.0f}%) across freshly tagged tracks")
+    if sampling and audio_seconds:
+        gui_update_fn(f"🎚️ Decoded {decoded_seconds / 60:.1f} of {audio_seconds / 60:.1f} minutes of audio "
+                      f"({100.0 * decoded_seconds / audio_seconds:.0f}%)")
+    if id3_stats.written or id3_stats.unchanged:
+        gui_update_fn(f"💽 ID3: {id3_stats.report()}")
+    if features is not None:
+        gui_update_fn(f"🧊 Spectrogram cache: {feature_hits} tracks windowed from cache, {feature_misses} decoded")
+    if cache is not None:
+        gui_update_fn(f"♻️ Result cache: {cache.hits} hits, {cache.misses} misses{' (bypassed)' if bypass_cache else ''}")
+    if manifest is not None:
+        gui_update_fn(f"⏭️ Skipped {up_to_date} files as up to date, tagged {tracks_done} new or changed")
+    gui_update_fn(f"🎉 All done tagging! Total time: {str(timedelta(seconds=int(total)))}")
+    track_status_fn("")
+    if done_fn is not None:
+        done_fn()
+    return summary
+
+def genre_tags(rankings, count=GENRE_TAGS):
+    """
+    The (tag, model) pairs that go into the ID3 genre, and the (ranking, position) of every entry
+    they came from. Rankings take turns: each one's best tag, then each one's second best, and so
+    on until count tags are picked. A tag that several rankings pick is written once, naming all
+    their models. With one ranking (a single model or a merged ensemble) this is its top count.
+    """
+    picked = {}  # tag -> [models], in pick order
+    starred = set()
+    depth = 0
+    while len(picked) < count and any(depth < len(ranking) for ranking in rankings):
+        for r, ranking in enumerate(rankings):
+            if depth >= len(ranking):
+                continue
+            tag, _, model = ranking[depth]
+            if tag in picked:
+                picked[tag].append(model)
+            elif len(picked) < count:
+                picked[tag] = [model]
+            else:
+                continue
+            starred.add((r, depth))
+        depth += 1
+    return [(tag, "+".join(dict.fromkeys(models))) for tag, models in picked.items()], starred
+
+def ranked_tags(tag_scores, tag_names, model, ensemble_merge="merge"):
+    """
+    Tags best first as lists of (tag, score, model): one list for a single model or a merged
+    ensemble, one per member (in member order) when ensemble_merge is "separate". Merged tags
+    average the scores of the members that predict them and name all of those members.
+    """
+    if "+" not in model:
+        return [[(tag_names[i], tag_scores[i], model) for i in np.argsort(tag_scores)[::-1]]]
+    by_member = {}
+    for label, score in zip(tag_names, tag_scores):
+        tag, member = tagger_engine.split_label(label, model)
+        by_member.setdefault(member, []).append((tag, score, member))
+    if ensemble_merge == "separate":
+        return [sorted(ranking, key=lambda entry: -entry[1]) for ranking in by_member.values()]
+    merged = {}
+    for ranking in by_member.values():
+        for tag, score, member in ranking:
+            merged.setdefault(tag, []).append((score, member))
+    return [sorted(((tag, float(np.mean([score for score, _ in entries])), "+".join(member for _, member in entries))
+                    for tag, entries in merged.items()), key=lambda entry: -entry[1])]
@@ -0,0 +1,896 @@
+"""
+Tagging engine for Dabbing Genre Tagger.
+
+musicnn's ``extractor()`` builds a fresh TensorFlow graph, opens a new session
+and restores the checkpoint every time it is called. Here the model is loaded
+once and the warm session is reused for every track (and every later run in
+the same process), so per-track time is spent on decoding and inference only.
+"""
+import collections
+import importlib.util
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+from musicnn import configuration
+
+# This Ignores the CUDA Error , Could not load dynamic library 'cudart64_110.dll' due to lack of gpu
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+# TensorFlow, librosa and musicnn's graph code take seconds to import, so they are
+# loaded on first use (or warmed in the background by the GUI) instead of here.
+tf = None
+librosa = None
+models = None
+_ml_lock = threading.Lock()
+
+def load_ml_stack():
+    """Import TensorFlow, librosa and musicnn's model code once; returns the seconds it took."""
+    global tf, librosa, models
+    start = time.time()
+    with _ml_lock:
+        if tf is None:
+            import librosa as _librosa
+            import tensorflow as _tf
+            from musicnn import models as _models
+            librosa, models = _librosa, _models
+            tf = _tf
+    return time.time() - start
+
+DEFAULT_MODEL = "MSD_musicnn"
+MODELS = ("MSD_musicnn", "MTT_musicnn", "MSD_musicnn_big", "MSD_vgg", "MTT_vgg")  # what musicnn ships
+ENSEMBLE_MERGES = ("merge", "separate")
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_DECODE_DEPTH = 4   # decoded tracks waiting for inference
+DEFAULT_WRITE_DEPTH = 8    # tagged tracks waiting for the writer
+DEFAULT_EARLY_EXIT_PATIENCE = 2       # batches the top tags must hold still
+DEFAULT_EARLY_EXIT_TOLERANCE = 0.02   # how far a top score may move and still count as still
+SAMPLE_MODES = ("off", "count", "percent")
+SAMPLE_PLACEMENTS = ("spread", "middle", "random")
+DEFAULT_SAMPLE_COUNT = 8
+
+# ========================
+# Audio Front-End
+# ========================
+
+def window_frames(input_length):
+    """Number of spectrogram frames in one input window (same as musicnn)."""
+    load_ml_stack()
+    return int(librosa.time_to_frames(input_length, sr=configuration.SR,
+                                      n_fft=configuration.FFT_SIZE,
+                                      hop_length=configuration.FFT_HOP)) + 1
+
+def hop_frames(n_frames, input_overlap):
+    """
+    Frames between the starts of two windows.
+    musicnn reads input_overlap as a hop in seconds; a falsy value means no overlap.
+    """
+    if not input_overlap:
+        return n_frames
+    load_ml_stack()
+    return max(1, int(librosa.time_to_frames(input_overlap, sr=configuration.SR,
+                                             n_fft=configuration.FFT_SIZE,
+                                             hop_length=configuration.FFT_HOP)))
+
+def decode_audio(filepath, offset=0.0, duration=None):
+    """Decode an audio file (or duration seconds of it from offset) to mono samples at musicnn's rate."""
+    load_ml_stack()
+    audio, _ = librosa.load(filepath, sr=configuration.SR, offset=offset, duration=duration)
+    return audio
+
+def log_mel(audio, sr=configuration.SR):
+    """Log-mel spectrogram of decoded samples, shape (frames, mels)."""
+    load_ml_stack()
+    audio_rep = librosa.feature.melspectrogram(y=audio,
+                                               sr=sr,
+                                               hop_length=configuration.FFT_HOP,
+                                               n_fft=configuration.FFT_SIZE,
+                                               n_mels=configuration.N_MELS).T
+    audio_rep = audio_rep.astype(np.float16)
+    return np.log10(10000 * audio_rep + 1)
+
+def compute_spectrogram(filepath, offset=0.0, duration=None):
+    """Decode an audio file (or duration seconds of it from offset) and return its log-mel spectrogram, shape (frames, mels)."""
+    return log_mel(decode_audio(filepath, offset, duration))
+
+def window_spectrogram(audio_rep, n_frames, hop, picked=None):
+    """Split a spectrogram into (possibly overlapping) windows of n_frames; only the picked ones if given."""
+    if audio_rep.shape[0] < n_frames:
+        raise ValueError("track is shorter than one input window")
+    windows = np.lib.stride_tricks.sliding_window_view(audio_rep, n_frames, axis=0)[::hop]
+    if picked is not None:
+        windows = windows[picked]
+    return np.ascontiguousarray(windows.transpose(0, 2, 1))
+
+# ========================
+# Sampled Decoding
+# ========================
+
+class Sampling:
+    """
+    Analyze only some of a track's windows: a count or a percentage of them, placed evenly
+    across the track ("spread"), as one block around the middle, or at random (seeded by the
+    window count, so re-runs pick the same windows).
+    """
+
+    def __init__(self, mode="count", value=DEFAULT_SAMPLE_COUNT, placement="spread"):
+        if mode not in SAMPLE_MODES[1:]:
+            raise ValueError(f"Unknown sample mode: {mode}")
+        if placement not in SAMPLE_PLACEMENTS:
+            raise ValueError(f"Unknown sample placement: {placement}")
+        self.mode = mode
+        self.value = float(value)
+        self.placement = placement
+
+    def pick(self, n_windows):
+        """Sorted indices of the windows to analyze out of n_windows."""
+        if self.mode == "count":
+            k = int(self.value)
+        else:
+            k = int(np.ceil(n_windows * self.value / 100.0))
+        k = min(n_windows, max(1, k))
+        if self.placement == "middle":
+            first = (n_windows - k) // 2
+            return np.arange(first, first + k)
+        if self.placement == "random":
+            return np.sort(np.random.default_rng(n_windows).choice(n_windows, k, replace=False))
+        return np.unique(np.linspace(0, n_windows - 1, k).round().astype(np.int64))
+
+    def variant(self):
+        """Tag for cache and manifest keys; sampled scores must not stand in for full ones."""
+        return f"sample-{self.mode}{self.value:g}-{self.placement}"
+
+def sample_spectrogram(filepath, length, n_frames, hop, sampling):
+    """
+    Decode only the sampled windows of a track of the given length (seconds).
+    Neighbouring windows are decoded as one segment. Returns (windows, total_windows, decoded_seconds).
+    """
+    frame_seconds = configuration.FFT_HOP / configuration.SR
+    total_frames = int(length * configuration.SR) // configuration.FFT_HOP + 1
+    total_windows = (total_frames - n_frames) // hop + 1
+    if total_windows < 1:
+        raise ValueError("track is shorter than one input window")
+    picked = sampling.pick(total_windows)
+    windows = np.empty((len(picked), n_frames, configuration.N_MELS), dtype=np.float16)
+    decoded_seconds = 0.0
+    # Runs of consecutive window indices share one decode
+    runs = np.split(picked, np.flatnonzero(np.diff(picked) != 1) + 1)
+    pos = 0
+    for run in runs:
+        n = (len(run) - 1) * hop + n_frames
+        audio_rep = compute_spectrogram(filepath, offset=run[0] * hop * frame_seconds, duration=n * frame_seconds)
+        if audio_rep.shape[0] < n:
+            # MP3 length estimates can overshoot the real end by a frame or two; pad with silence
+            audio_rep = np.pad(audio_rep, ((0, n - audio_rep.shape[0]), (0, 0)))
+        windows[pos:pos + len(run)] = window_spectrogram(audio_rep[:n], n_frames, hop)
+        decoded_seconds += n * frame_seconds
+        pos += len(run)
+    return windows, total_windows, decoded_seconds
+
+# ========================
+# Early Exit
+# ========================
+
+def spread_order(n):
+    """
+    Window indices in an order that covers the whole track early on: start, middle, quarters,
+    eighths, ... (bit-reversed counting), so any prefix is a fair sample of the track.
+    """
+    bits = max(1, int(n - 1).bit_length())
+    reversed_index = [int(format(i, f"0{bits}b")[::-1], 2) for i in range(1 << bits)]
+    return np.array([i for i in reversed_index if i < n], dtype=np.int64)
+
+class EarlyExit:
+    """Settings for stopping a track's inference once its top-k tags have converged."""
+
+    def __init__(self, patience=DEFAULT_EARLY_EXIT_PATIENCE, tolerance=DEFAULT_EARLY_EXIT_TOLERANCE,
+                 top_k=3, min_windows=8):
+        self.patience = max(1, int(patience))
+        self.tolerance = float(tolerance)
+        self.top_k = int(top_k)
+        self.min_windows = int(min_windows)
+
+    def tracker(self):
+        return ConvergenceTracker(self)
+
+class ConvergenceTracker:
+    """Running mean of one track's window scores and how many batches its top-k has held still."""
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.total = None
+        self.count = 0
+        self.stable = 0
+        self._top = None
+        self._top_scores = None
+
+    def update(self, scores):
+        """Add a batch of window scores; returns True once the ranking and margins have settled."""
+        self.total = scores.sum(axis=0) if self.total is None else self.total + scores.sum(axis=0)
+        self.count += len(scores)
+        mean = self.total / self.count
+        # The (k+1)-th score is tracked too, so the margin below the top-k has to settle as well
+        top = np.argsort(mean)[::-1][:self.rule.top_k + 1]
+        if (self._top is not None and np.array_equal(top[:self.rule.top_k], self._top[:self.rule.top_k])
+                and np.max(np.abs(mean[top] - self._top_scores)) < self.rule.tolerance):
+            self.stable += 1
+        else:
+            self.stable = 0
+        self._top = top
+        self._top_scores = mean[top]
+        return self.count >= self.rule.min_windows and self.stable >= self.rule.patience
+
+# ========================
+# Tagging Jobs
+# ========================
+
+class TagJob:
+    """One track moving through the engine; each stage fills in its part."""
+
+    def __init__(self, key, filepath):
+        self.key = key
+        self.filepath = filepath
+        self.length = None    # track length in seconds, when known
+        self.skip = None      # message to log instead of tagging (too short, unreadable, ...)
+        self.error = None
+        self.windows = None
+        self.taggram = None
+        self.scores = None    # mean over windows; set without a taggram for cache hits
+        self.num_windows = None   # windows actually scored
+        self.total_windows = None  # windows in the track; more than num_windows after sampling or an early exit
+        self.window_order = None   # spread order the windows were scored in, with early exit
+        self.decoded_seconds = None
+        self.convergence = None
+        self.labels = None
+        self.cache_key = None
+        self.content_hash = None  # audio hash, when a cache needs it
+        self.feature_hit = None   # True if the spectrogram came from the feature cache
+        self.timings = {}
+
+    @property
+    def ready(self):
+        """True once nothing is left for the engine to do with this job."""
+        return self.skip is not None or self.error is not None or self.scores is not None
+
+def decode_jobs(jobs, n_frames, hop, sampling=None, features=None):
+    """
+    Decode each pending job into input windows; ready jobs pass straight through.
+    With a Sampling (and a known track length) only the sampled windows are decoded.
+    With a FeatureCache, spectrograms of jobs with a content_hash are windowed from the cache
+    when present, and full decodes are added to it.
+    """
+    for job in jobs:
+        if not job.ready:
+            start = time.time()
+            try:
+                audio_rep = None
+                if features is not None and job.content_hash is not None:
+                    audio_rep = features.get(job.content_hash)
+                    job.feature_hit = audio_rep is not None
+                if audio_rep is not None:
+                    # No decoding at all, whatever the window settings or sampling
+                    picked = None
+                    if sampling is not None:
+                        total_windows = (len(audio_rep) - n_frames) // hop + 1
+                        picked = sampling.pick(total_windows) if total_windows > 0 else None
+                    job.windows = window_spectrogram(audio_rep, n_frames, hop, picked)
+                    job.total_windows = (len(audio_rep) - n_frames) // hop + 1
+                    job.decoded_seconds = 0.0
+                elif sampling is not None and job.length:
+                    job.windows, job.total_windows, job.decoded_seconds = sample_spectrogram(
+                        job.filepath, job.length, n_frames, hop, sampling)
+                else:
+                    audio_rep = compute_spectrogram(job.filepath)
+                    if features is not None and job.content_hash is not None:
+                        features.put(job.content_hash, audio_rep)
+                    job.windows = window_spectrogram(audio_rep, n_frames, hop)
+                    job.decoded_seconds = job.length
+            except Exception as e:
+                job.error = str(e)
+            job.timings["decode"] = time.time() - start
+            job.timings["decode_at"] = start
+        yield job
+
+# ========================
+# Pipeline Stages
+# ========================
+
+class StageWaits:
+    """Seconds each pipeline stage spent waiting on its neighbours; the bottleneck waits least."""
+
+    def __init__(self):
+        self.waits = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, side, seconds):
+        with self._lock:
+            stage_waits = self.waits.setdefault(stage, {"input": 0.0, "output": 0.0})
+            stage_waits[side] += seconds
+
+    def merge(self, waits):
+        for stage, sides in waits.items():
+            for side, seconds in sides.items():
+                self.add(stage, side, seconds)
+
+    def report(self):
+        """One console line per stage."""
+        return [f"{stage}: waited {sides['input']:.2f}s for input, {sides['output']:.2f}s for output"
+                for stage, sides in self.waits.items()]
+
+_DONE = object()
+
+def run_ahead(items, depth, waits, producer, consumer):
+    """
+    Run a generator stage in its own thread, at most depth items ahead of its consumer.
+    Time blocked on a full queue counts as the producer's output wait, time blocked on an
+    empty one as the consumer's input wait. A depth of 0 keeps the stage inline.
+    Closing this generator stops the stage thread, which closes items itself; the close
+    returns once that thread is done, so items is never touched from two threads at once.
+    """
+    if depth <= 0:
+        yield from items
+        return
+
+    buffer = queue.Queue(maxsize=depth)
+    cancelled = threading.Event()
+
+    def put(item):
+        start = time.time()
+        while not cancelled.is_set():
+            try:
+                buffer.put(item, timeout=0.2)
+                break
+            except queue.Full:
+                pass
+        waits.add(producer, "output", time.time() - start)
+
+    def produce():
+        try:
+            for item in items:
+                if cancelled.is_set():
+                    return
+                put(item)
+        except BaseException as e:
+            put((_DONE, e))
+            return
+        finally:
+            if hasattr(items, "close"):
+                items.close()
+        put((_DONE, None))
+
+    stage = threading.Thread(target=produce, name=f"{producer}-stage", daemon=True)
+    stage.start()
+    try:
+        while True:
+            start = time.time()
+            item = buffer.get()
+            waits.add(consumer, "input", time.time() - start)
+            if isinstance(item, tuple) and len(item) == 2 and item[0] is _DONE:
+                if item[1] is not None:
+                    raise item[1]
+                return
+            yield item
+    finally:
+        cancelled.set()
+        stage.join()
+
+# ========================
+# Warm Model
+# ========================
+
+def ensemble_name(models):
+    """One name for a set of models, used like a model name in cache keys, stores and settings."""
+    return "+".join(models)
+
+def ensemble_members(model):
+    """The models behind a (possibly ensemble) model name."""
+    return model.split("+")
+
+def split_label(label, model):
+    """(tag, model that predicts it) for a label of model; ensembles qualify labels as "member:tag"."""
+    if "+" in model:
+        member, _, tag = label.partition(":")
+        return tag, member
+    return label, model
+
+def model_labels(model):
+    """The tag vocabulary a musicnn model predicts; an ensemble's labels are qualified with their member."""
+    if "+" in model:
+        return [f"{member}:{label}" for member in ensemble_members(model) for label in model_labels(member)]
+    if "MTT" in model:
+        return list(configuration.MTT_LABELS)
+    if "MSD" in model:
+        return list(configuration.MSD_LABELS)
+    raise ValueError(f"Unknown musicnn model: {model}")
+
+class MusicnnModel:
+    """A musicnn graph and session that are built once and reused for every track."""
+
+    def __init__(self, model=DEFAULT_MODEL, input_length=3, threads=None):
+        self.labels = model_labels(model)
+        if "vgg" in model and float(input_length) != 3:
+            raise ValueError("Set input_length=3, the VGG models cannot handle different input lengths.")
+
+        self.model = model
+        self.input_length = float(input_length)
+        load_ml_stack()
+        self.n_frames = window_frames(self.input_length)
+
+        start = time.time()
+        self.graph = tf.Graph()
+        with self.graph.as_default():
+            with tf.name_scope("model"):
+                self._x = tf.compat.v1.placeholder(tf.float32, [None, self.n_frames, configuration.N_MELS])
+                self._is_training = tf.compat.v1.placeholder(tf.bool)
+                outputs = models.define_model(self._x, self._is_training, model, len(self.labels))
+                self._y = tf.nn.sigmoid(outputs[0])
+            init = tf.compat.v1.global_variables_initializer()
+            saver = tf.compat.v1.train.Saver()
+            session_config = None
+            if threads:
+                # Keep each worker process on its share of the cores instead of all of them
+                session_config = tf.compat.v1.ConfigProto(intra_op_parallelism_threads=threads,
+                                                          inter_op_parallelism_threads=1)
+            self.session = tf.compat.v1.Session(graph=self.graph, config=session_config)
+            self.session.run(init)
+            # The restore must run in graph mode: outside this block TF 2 is eager and the Saver refuses
+            try:
+                saver.restore(self.session, os.path.dirname(models.__file__) + "/" + model + "/")
+            except Exception as e:
+                self.session.close()
+                raise ValueError(f"Could not restore the {model} checkpoint: {e}")
+        self.setup_time = time.time() - start
+
+    def predict(self, windows):
+        """Run a batch of windows through the network and return (windows, tags) scores."""
+        return self.session.run(self._y, feed_dict={self._x: windows.astype(np.float32),
+                                                    self._is_training: False})
+
+    def iter_scores(self, windows, batch_size=DEFAULT_BATCH_SIZE):
+        """Yield (first_window, scores) for each batch of windows as soon as it has been scored."""
+        batch_size = max(1, int(batch_size))
+        for start in range(0, len(windows), batch_size):
+            yield start, self.predict(windows[start:start + batch_size])
+
+    def extract(self, filepath, input_overlap=False, timings=None, batch_size=DEFAULT_BATCH_SIZE,
+                on_progress=None, should_stop=None):
+        """
+        Tag one file with the warm session.
+        Returns (taggram, tags) like musicnn's extractor; decode/inference seconds go into timings.
+        on_progress(done, total) is called after every batch; if should_stop() turns true between
+        batches the taggram only holds the windows scored so far.
+        """
+        start = time.time()
+        audio_rep = compute_spectrogram(filepath)
+        windows = window_spectrogram(audio_rep, self.n_frames, hop_frames(self.n_frames, input_overlap))
+        decoded = time.time()
+        taggram = np.empty((len(windows), len(self.labels)), dtype=np.float32)
+        done = 0
+        for first, scores in self.iter_scores(windows, batch_size):
+            taggram[first:first + len(scores)] = scores
+            done = first + len(scores)
+            if on_progress is not None:
+                on_progress(done, len(windows))
+            if should_stop is not None and should_stop():
+                break
+        if timings is not None:
+            timings["decode"] = decoded - start
+            timings["inference"] = time.time() - decoded
+        return taggram[:done], self.labels
+
+    def tag_stream(self, jobs, batch_size=DEFAULT_BATCH_SIZE, on_progress=None, should_stop=None, early_exit=None):
+        """
+        Pack windows from many decoded jobs into fixed-size batches and run them together.
+        Jobs are yielded in their original order once every one of their windows is scored.
+        on_progress(key, done, total) reports each job's scored windows after every batch, and
+        the stream ends between batches, mid-track if need be, once should_stop() is true.
+        With an EarlyExit, windows are scored in spread order and a track's remaining windows
+        are dropped as soon as its top tags converge.
+        """
+        batch_size = max(1, int(batch_size))
+        should_stop = should_stop or (lambda: False)
+        waiting = collections.deque()  # [job, windows already scheduled]
+        queued = 0
+        for job in jobs:
+            if job.windows is not None:
+                job.labels = self.labels
+                job.taggram = np.empty((len(job.windows), len(self.labels)), dtype=np.float32)
+                job.num_windows = len(job.windows)
+                job.total_windows = job.total_windows or job.num_windows
+                if early_exit is not None:
+                    job.window_order = spread_order(len(job.windows))
+                    job.windows = job.windows[job.window_order]
+                    job.convergence = early_exit.tracker()
+                queued += len(job.windows)
+            waiting.append([job, 0])
+            while queued >= batch_size:
+                if should_stop():
+                    return
+                queued -= self._run_batch(waiting, batch_size, on_progress)
+            yield from self._pop_finished(waiting)
+        while waiting:
+            if should_stop():
+                return
+            self._run_batch(waiting, batch_size, on_progress)
+            yield from self._pop_finished(waiting)
+
+    def _run_batch(self, waiting, batch_size, on_progress=None):
+        """
+        Score the next batch_size unscheduled windows, spread over as many jobs as needed.
+        Returns how many queued windows are gone: scored ones plus any an early exit dropped.
+        If the batch fails (e.g. out of memory), every job in it fails with the error and its
+        remaining windows are dropped; the other tracks carry on.
+        """
+        slices = []
+        room = batch_size
+        for entry in waiting:
+            job, offset = entry
+            if job.windows is None or offset == len(job.windows):
+                continue
+            take = min(room, len(job.windows) - offset)
+            slices.append((entry, offset, offset + take))
+            room -= take
+            if not room:
+                break
+        if not slices:
+            return 0
+
+        start = time.time()
+        try:
+            scores = self.predict(np.concatenate([entry[0].windows[a:b] for entry, a, b in slices]))
+        except Exception as e:
+            dropped = 0
+            for entry, a, _ in slices:
+                job = entry[0]
+                job.error = f"inference failed: {e}"
+                dropped += len(job.windows) - a
+                entry[1] = len(job.windows)
+                if on_progress is not None:
+                    on_progress(job.key, entry[1], len(job.windows))
+            return dropped
+        elapsed = time.time() - start
+        pos = 0
+        dropped = 0
+        for entry, a, b in slices:
+            job = entry[0]
+            job.taggram[a:b] = scores[pos:pos + b - a]
+            job.timings["inference"] = job.timings.get("inference", 0.0) + elapsed * (b - a) / len(scores)
+            job.timings.setdefault("inference_at", start)
+            job.timings["inference_end"] = start + elapsed
+            entry[1] = b
+            if job.convergence is not None and b < len(job.windows) and job.convergence.update(scores[pos:pos + b - a]):
+                dropped += len(job.windows) - b
+                job.num_windows = b
+                entry[1] = len(job.windows)
+            pos += b - a
+            if on_progress is not None:
+                on_progress(job.key, entry[1], len(job.windows))
+        return len(scores) + dropped
+
+    def _pop_finished(self, waiting):
+        while waiting:
+            job, offset = waiting[0]
+            if job.windows is not None and offset < len(job.windows):
+                return
+            waiting.popleft()
+            if job.windows is not None and job.error is not None:
+                job.windows = job.taggram = None  # its batch failed; nothing to average
+            elif job.windows is not None:
+                if job.window_order is not None:
+                    # Back to track order, keeping only the windows that were scored
+                    scored = job.window_order[:job.num_windows]
+                    job.taggram = job.taggram[:job.num_windows][np.argsort(scored)]
+                    job.window_order = np.sort(scored)
+                    job.convergence = None
+                job.scores = np.mean(job.taggram, axis=0)
+                job.windows = None  # free the decoded audio as soon as it is scored
+            yield job
+
+    def close(self):
+        self.session.close()
+
+class EnsembleModel(MusicnnModel):
+    """
+    Several warm musicnn models behind one MusicnnModel interface. They all take the same input
+    windows, so every track is decoded once and each batch is fed to every member; the scores come
+    back side by side, one column per member label (see model_labels / split_label).
+    """
+
+    def __init__(self, members, owns_members=True):
+        n_frames = {member.n_frames for member in members}
+        if len(n_frames) != 1:
+            raise ValueError("Ensemble members need the same input length")
+        self.members = members
+        self.model = ensemble_name([member.model for member in members])
+        self.labels = model_labels(self.model)
+        self.input_length = members[0].input_length
+        self.n_frames = members[0].n_frames
+        self.setup_time = sum(member.setup_time for member in members)
+        self._owns_members = owns_members
+
+    def predict(self, windows):
+        return np.concatenate([member.predict(windows) for member in self.members], axis=1)
+
+    def close(self):
+        if self._owns_members:
+            for member in self.members:
+                member.close()
+
+def load_model(model=DEFAULT_MODEL, input_length=3, threads=None):
+    """A fresh MusicnnModel, or an EnsembleModel for a name like "MSD_musicnn+MTT_musicnn"."""
+    if "+" in model:
+        return EnsembleModel([MusicnnModel(member, input_length, threads) for member in ensemble_members(model)])
+    return MusicnnModel(model, input_length, threads)
+
+_models = {}
+_models_lock = threading.Lock()
+
+def get_model(model=DEFAULT_MODEL, input_length=3):
+    """Return the warm model for this process, loading it only if the settings changed."""
+    if "+" in model:
+        # Ensembles are rebuilt around the cached members, so a member is never loaded twice
+        return EnsembleModel([get_model(member, input_length) for member in ensemble_members(model)],
+                             owns_members=False)
+    with _models_lock:
+        warm = _models.get(model)
+        if warm is not None and warm.input_length == float(input_length):
+            return warm
+        if warm is not None:
+            warm.close()
+        _models[model] = MusicnnModel(model, input_length)
+        return _models[model]
+
+def extract(filepath, model=DEFAULT_MODEL, input_length=3, input_overlap=False, timings=None, **kwargs):
+    """Drop-in replacement for musicnn.extractor.extractor that reuses the warm model."""
+    return get_model(model, input_length).extract(filepath, input_overlap, timings, **kwargs)
+
+# ========================
+# Worker Processes
+# ========================
+
+def _worker_main(model, input_length, input_overlap, batch_size, decode_depth, threads, early_exit, sampling,
+                 features, job_queue, result_queue, cancel_event):
+    """Entry point of one tagging worker: load a private model, then tag jobs until told to stop."""
+    try:
+        warm = load_model(model, input_length, threads=threads)
+    except Exception as e:
+        result_queue.put(("failed", str(e)))
+        return
+    result_queue.put(("ready", warm.setup_time))
+
+    def pull_jobs():
+        while not cancel_event.is_set():
+            job = job_queue.get()
+            if job is None:
+                return
+            yield job
+
+    waits = StageWaits()
+    hop = hop_frames(warm.n_frames, input_overlap)
+    decoded = run_ahead(decode_jobs(pull_jobs(), warm.n_frames, hop, sampling, features),
+                        decode_depth, waits, "decode", "inference")
+
+    def progress(key, done, total):
+        result_queue.put(("progress", (key, done, total)))
+
+    for job in warm.tag_stream(decoded, batch_size, on_progress=progress, should_stop=cancel_event.is_set,
+                               early_exit=early_exit):
+        if cancel_event.is_set():
+            break
+        result_queue.put(("job", job))
+    decoded.close()
+    if features is not None:
+        features.close()
+    if cancel_event.is_set():
+        result_queue.cancel_join_thread()
+    result_queue.put(("exit", waits.waits))
+
+class WorkerPool:
+    """
+    Worker processes that each hold their own warm model and pull jobs from one shared queue.
+    The parent keeps everything else (ID3 writes, Excel export, GUI); finished jobs come back
+    with their taggram, error and timings filled in.
+    """
+
+    def __init__(self, workers, model=DEFAULT_MODEL, input_length=3, input_overlap=False,
+                 batch_size=DEFAULT_BATCH_SIZE, decode_depth=DEFAULT_DECODE_DEPTH, early_exit=None, sampling=None,
+                 features=None):
+        self.workers = max(1, int(workers))
+        self.setup_times = []
+        self.errors = []
+        self.waits = StageWaits()  # summed over all workers
+        context = multiprocessing.get_context("spawn")
+        self._jobs = context.Queue(maxsize=self.workers * 4)
+        self._results = context.Queue()
+        self._cancel = context.Event()
+        self._settled = queue.Queue()  # jobs that never need a worker (skips, cache hits, ...)
+        self._in_flight = {}  # key -> job handed to the workers and not back yet
+        self._in_flight_lock = threading.Lock()
+        self._exited = 0
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._processes = [
+            context.Process(target=_worker_main, daemon=True,
+                            args=(model, float(input_length), input_overlap, batch_size, decode_depth, threads,
+                                  early_exit, sampling, features, self._jobs, self._results, self._cancel))
+            for _ in range(self.workers)
+        ]
+        with _spawn_from_engine():
+            for process in self._processes:
+                process.start()
+
+    def _feed(self, jobs):
+        """Hand pending jobs to the workers; jobs that are already settled skip the round trip."""
+        try:
+            for job in jobs:
+                if self._cancel.is_set():
+                    break
+                if job.ready:
+                    self._settled.put(job)
+                    continue
+                with self._in_flight_lock:
+                    self._in_flight[job.key] = job
+                while not self._cancel.is_set():
+                    try:
+                        self._jobs.put(job, timeout=0.2)
+                        break
+                    except queue.Full:
+                        pass
+        finally:
+            for _ in self._processes:
+                self._put_sentinel()
+
+    def _put_sentinel(self):
+        while True:
+            try:
+                self._jobs.put(None, timeout=0.2)
+                return
+            except queue.Full:
+                if self._cancel.is_set():
+                    self._drain(self._jobs)
+
+    def run(self, jobs, should_stop=lambda: False, on_progress=None):
+        """
+        Feed jobs to the workers and yield them back in completion order.
+        on_progress(key, done, total) relays the workers' per-batch progress.
+        Jobs held by a worker that died come back with an error set, and the crash is in errors.
+        """
+        feeder = threading.Thread(target=self._feed, args=(jobs,), daemon=True)
+        feeder.start()
+        while self._exited < self.workers:
+            yield from self._pop_settled()
+            if should_stop():
+                self.cancel()
+                return
+            try:
+                start = time.time()
+                message = self._results.get(timeout=0.1)
+                self.waits.add("write", "input", time.time() - start)
+            except queue.Empty:
+                self.waits.add("write", "input", time.time() - start)
+                if not any(process.is_alive() for process in self._processes):
+                    crashed = sum(process.exitcode != 0 for process in self._processes)
+                    self.errors.append(f"{crashed} tagging worker(s) exited unexpectedly")
+                    self.cancel()
+                    # Whatever the dead workers sent before they went is still worth keeping
+                    while True:
+                        try:
+                            message = self._results.get_nowait()
+                        except (queue.Empty, OSError, ValueError):
+                            break
+                        yield from self._handle(message, on_progress)
+                    break
+                continue
+            yield from self._handle(message, on_progress)
+        if self.errors and not self.setup_times:
+            self.cancel()
+            raise RuntimeError(f"No tagging worker could load the model: {self.errors[0]}")
+        feeder.join()
+        yield from self._pop_settled()
+        # Jobs a crashed worker took with it are reported as failed instead of silently dropped
+        with self._in_flight_lock:
+            lost = sorted(self._in_flight.values(), key=lambda job: job.key)
+            self._in_flight.clear()
+        for job in lost:
+            job.error = "its tagging worker exited unexpectedly"
+            yield job
+
+    def _handle(self, message, on_progress):
+        """Act on one message from a worker; yields the job if it carries one."""
+        kind, payload = message
+        if kind == "job":
+            with self._in_flight_lock:
+                self._in_flight.pop(payload.key, None)
+            yield payload
+        elif kind == "progress":
+            if on_progress is not None:
+                on_progress(*payload)
+        elif kind == "ready":
+            self.setup_times.append(payload)
+        elif kind == "failed":
+            self.errors.append(payload)
+            self._exited += 1
+        elif kind == "exit":
+            self.waits.merge(payload)
+            self._exited += 1
+
+    def _pop_settled(self):
+        while True:
+            try:
+                yield self._settled.get_nowait()
+            except queue.Empty:
+                return
+
+    def cancel(self):
+        """Stop every worker: no more jobs are handed out and in-flight batches are dropped."""
+        self._cancel.set()
+        self._drain(self._jobs)
+
+    def close(self, timeout=5):
+        for process in self._processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1)
+        self._drain(self._results)
+
+    @staticmethod
+    def _drain(q):
+        while True:
+            try:
+                q.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                return
+
+class _spawn_from_engine:
+    """
+    Spawned children re-run the parent's __main__ script before starting, and main.py builds
+    the whole Tk GUI at import time. Point them at this module instead while workers start.
+    """
+
+    def __enter__(self):
+        self._main = sys.modules["__main__"]
+        self._spec = getattr(self._main, "__spec__", None)
+        if self._spec is None:
+            self._main.__spec__ = importlib.util.find_spec(__name__)
+
+    def __exit__(self, *exc):
+        self._main.__spec__ = self._spec
+
+# ========================
+# Smoke Check
+# ========================
+
+def smoke_check(model=DEFAULT_MODEL, input_length=3):
+    """Load a model's real checkpoint and score one silent window; returns the (windows, tags) shape."""
+    warm = load_model(model, input_length)
+    try:
+        return warm.predict(np.zeros((1, warm.n_frames, configuration.N_MELS), dtype=np.float32)).shape
+    finally:
+        warm.close()
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check that musicnn models load from their checkpoints and predict.")
+    parser.add_argument("models", nargs="*", choices=MODELS, default=[DEFAULT_MODEL], metavar="MODEL",
+                        help=f"models to check (default: {DEFAULT_MODEL}; any of {', '.join(MODELS)})")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for model in args.models:
+        start = time.time()
+        try:
+            shape = smoke_check(model)
+        except Exception as e:
+            print(f"❌ {model}: {e}", flush=True)
+            failed += 1
+            continue
+        print(f"✅ {model}: loaded and scored one window -> {shape} in {time.time() - start:.1f}s", flush=True)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Streaming result export for Dabbing Genre Tagger.
+
+Rows are appended as each track finishes instead of being collected for one big
+save at the end, so memory stays flat on any library size and a crash or Stop
+keeps everything tagged so far. CSV and JSONL files are flushed after every
+track. The Excel file is rebuilt from an on-disk spool with openpyxl's
+write-only workbook every so often (and at the end), and is swapped in
+atomically so it can be opened at any point during a run.
+"""
+import csv
+import json
+import os
+import time
+
+EXPORT_BASENAME = "suno_tags"
+EXPORT_FORMATS = ("xlsx", "csv", "jsonl")
+HEADER = ["Filename", "Tag", "Score", "Model"]
+SYNC_EVERY = 50             # tracks between fsyncs of the text exports
+EXCEL_FLUSH_SECONDS = 30    # minimum time between Excel rebuilds
+EXCEL_FLUSH_OVERHEAD = 10   # ...and at least this many times the last rebuild took
+
+class CsvSink:
+    """Filename,Tag,Score,Model rows, one per tag, like the Excel sheet."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(HEADER)
+
+    def add(self, filename, tags):
+        self._writer.writerows([filename, tag, round(score, 4), model] for tag, score, model in tags)
+        self._file.flush()
+
+    def sync(self):
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+class JsonlSink:
+    """One JSON object per track: {"file": ..., "tags": [[tag, score, model], ...]}."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    def add(self, filename, tags):
+        self._file.write(json.dumps({"file": filename, "tags": [[tag, round(score, 4), model] for tag, score, model in tags]},
+                                    ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def sync(self):
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+class ExcelSink:
+    """
+    suno_tags.xlsx rebuilt from a row spool next to it. openpyxl's write-only mode streams rows
+    straight to disk, so a rebuild never holds the sheet in memory; the spool is removed on close.
+    """
+
+    def __init__(self, path, log_fn=None):
+        self.path = path
+        self._log = log_fn or (lambda text: None)
+        self._spool_path = path + ".rows"
+        self._spool = CsvSink(self._spool_path)
+        self._dirty = False
+        self._last_flush = time.time()
+        self._last_cost = 0.0
+
+    def add(self, filename, tags):
+        self._spool.add(filename, tags)
+        self._dirty = True
+        wait = max(EXCEL_FLUSH_SECONDS, EXCEL_FLUSH_OVERHEAD * self._last_cost)
+        if time.time() - self._last_flush >= wait:
+            self.flush()
+
+    def sync(self):
+        self._spool.sync()
+
+    def flush(self):
+        """Write the spooled rows into a fresh workbook and swap it in place of the old one."""
+        if not self._dirty:
+            return
+        from openpyxl import Workbook  # only needed once there is something to export
+        start = time.time()
+        tmp_path = self.path + ".tmp"
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        with open(self._spool_path, newline="", encoding="utf-8") as f:
+            rows = csv.reader(f)
+            ws.append(next(rows))
+            for filename, tag, score, model in rows:
+                ws.append([filename, tag, float(score), model])
+        wb.save(tmp_path)
+        try:
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            # Usually the sheet is open in Excel on Windows; keep the spool and try again next time
+            self._log(f"⚠️ Could not update {os.path.basename(self.path)} yet: {e}")
+        self._last_flush = time.time()
+        self._last_cost = self._last_flush - start
+
+    def close(self):
+        self._spool.close()
+        self.flush()
+        if not self._dirty:
+            os.remove(self._spool_path)
+
+class ResultExporter:
+    """
+    Fan tagged tracks out to the selected export formats in folder_path.
+    Files are created on the first add(), so a run that tags nothing leaves earlier exports alone.
+    """
+
+    def __init__(self, folder_path, formats=("xlsx",), log_fn=None, basename=EXPORT_BASENAME):
+        unknown = set(formats) - set(EXPORT_FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown export format(s): {', '.join(sorted(unknown))}")
+        self.folder_path = folder_path
+        self.formats = tuple(f for f in EXPORT_FORMATS if f in formats)
+        self.basename = basename
+        self.rows = 0
+        self._log = log_fn
+        self._sinks = None
+
+    @property
+    def paths(self):
+        return [os.path.join(self.folder_path, f"{self.basename}.{fmt}") for fmt in self.formats]
+
+    def _open(self):
+        sink_types = {"xlsx": lambda path: ExcelSink(path, self._log), "csv": CsvSink, "jsonl": JsonlSink}
+        self._sinks = [sink_types[fmt](path) for fmt, path in zip(self.formats, self.paths)]
+
+    def add(self, filename, tags):
+        """Append one track's (tag, score, model) list to every export."""
+        if self._sinks is None:
+            self._open()
+        for sink in self._sinks:
+            sink.add(filename, tags)
+        self.rows += 1
+        if self.rows % SYNC_EVERY == 0:
+            for sink in self._sinks:
+                sink.sync()
+
+    def close(self):
+        """Final flush; the exports are complete after this."""
+        if self._sinks is None:
+            return
+        for sink in self._sinks:
+            sink.close()
+        self._sinks = None
@@ -0,0 +1,123 @@
+"""
+Spectrogram cache for Dabbing Genre Tagger.
+
+Decoding, resampling and the mel transform cost far more than cutting the
+result into windows, and they don't depend on the chunk length or overlap.
+With the feature cache on, each track's full log-mel spectrogram is kept as a
+float16 .npy file keyed by the same audio hash as the result cache (ID3 tags
+excluded), and later runs memory-map it and re-window it for whatever
+input_length / input_overlap they use. An SQLite index tracks sizes and last
+use so the cache stays under its size cap, evicting least recently used files.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_MAX_MB = 2048
+FEATURES_DIRNAME = "feature_cache"
+INDEX_FILENAME = "index.sqlite"
+
+class FeatureCache:
+    """
+    Log-mel spectrograms (frames, mels) per audio hash under folder, capped at max_mb.
+    The database is opened on first use, so the cache can be handed to worker processes,
+    which each open their own connection.
+    """
+
+    def __init__(self, folder, max_mb=DEFAULT_MAX_MB):
+        self.folder = folder
+        self.max_mb = float(max_mb)
+        self.max_bytes = int(self.max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+    def __reduce__(self):
+        return FeatureCache, (self.folder, self.max_mb)
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(self.folder, exist_ok=True)
+            # Worker processes share the index; wait for each other's writes instead of failing
+            self._db = sqlite3.connect(os.path.join(self.folder, INDEX_FILENAME), timeout=30, check_same_thread=False)
+            self._db.execute("""CREATE TABLE IF NOT EXISTS features (
+                hash TEXT PRIMARY KEY,
+                frames INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS features_last_used ON features (last_used)")
+            self._db.commit()
+        return self._db
+
+    def _path(self, content_hash):
+        return os.path.join(self.folder, content_hash[:2], f"{content_hash}.npy")
+
+    def get(self, content_hash):
+        """The cached spectrogram as a read-only memory map, or None on a miss."""
+        path = self._path(content_hash)
+        with self._lock:
+            try:
+                db = self._connect()
+                if db.execute("SELECT 1 FROM features WHERE hash = ?", (content_hash,)).fetchone() is None:
+                    self.misses += 1
+                    return None
+                try:
+                    audio_rep = np.load(path, mmap_mode="r")
+                except (OSError, ValueError):
+                    # Evicted by another process or damaged: forget it and decode again
+                    db.execute("DELETE FROM features WHERE hash = ?", (content_hash,))
+                    db.commit()
+                    self.misses += 1
+                    return None
+                db.execute("UPDATE features SET last_used = ? WHERE hash = ?", (time.time(), content_hash))
+                db.commit()
+            except sqlite3.Error:
+                return None
+        self.hits += 1
+        return audio_rep
+
+    def put(self, content_hash, audio_rep):
+        """Store a track's spectrogram and evict old ones if the cache grew past its cap."""
+        path = self._path(content_hash)
+        audio_rep = np.asarray(audio_rep, dtype=np.float16)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, audio_rep)
+                os.replace(tmp_path, path)  # readers never see a half-written file
+                db = self._connect()
+                db.execute("INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?)",
+                           (content_hash, len(audio_rep), os.path.getsize(path), time.time()))
+                self._evict(db)
+                db.commit()
+            except (OSError, sqlite3.Error):
+                pass
+
+    def _evict(self, db):
+        # Summed from the index each time, since other processes add entries too
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM features").fetchone()[0]
+        while total > self.max_bytes:
+            rows = db.execute("SELECT hash, size FROM features ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                return
+            for content_hash, size in rows:
+                db.execute("DELETE FROM features WHERE hash = ?", (content_hash,))
+                try:
+                    os.remove(self._path(content_hash))
+                except OSError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    return
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
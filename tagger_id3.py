@@ -0,0 +1,193 @@
+"""
+ID3 tag I/O for Dabbing Genre Tagger.
+
+Each MP3 is parsed once: the same parse answers the length check before
+tagging and carries the genre write afterwards. Writes that would not change
+the genre are skipped, and saves keep the tag's existing padding so the new
+genre usually fits in place; only a tag that has to grow rewrites the audio
+behind it, and then it gets enough padding that the next update won't.
+
+The Metadata Editor's bulk field updates go through the same rules on a small
+thread pool: files whose fields already match are left untouched.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import TCON, TXXX
+from mutagen.mp3 import MP3
+
+GROW_PADDING = 4096  # padding given to a tag that had to be enlarged anyway
+MODELS_DESC = "GENRE_MODELS"  # TXXX frame naming the model(s) behind each written genre
+EDIT_WORKERS = 4
+
+# Metadata Editor labels -> EasyID3 keys
+EDITOR_FIELDS = {
+    "Contributing Artist": "artist",
+    "Album Artist": "albumartist",
+    "Album Title": "album",
+    "Year": "date",
+    "Publisher": "organization",
+    "Copyright": "copyright",
+}
+
+def _save_keeping_padding(audio, path):
+    """Save audio's tag keeping its padding; returns (bytes_rewritten, in_place)."""
+    old_size = getattr(audio.tags, "size", 0) or 0
+    fits = []
+
+    def keep_padding(info):
+        fits.append(info.padding >= 0)
+        return info.padding if info.padding >= 0 else GROW_PADDING
+
+    audio.save(padding=keep_padding)
+    if fits and fits[0] and old_size:
+        return old_size, True
+    # The tag grew (or is new), so everything behind it was moved as well
+    return os.path.getsize(path), False
+
+class TrackTags:
+    """One parse of an MP3's frame info and ID3v2 tag, reused for reading and writing."""
+
+    def __init__(self, path):
+        self.path = path
+        self.audio = MP3(path)
+        self.length = self.audio.info.length
+
+    @property
+    def genre(self):
+        """The genre text as stored (empty if there is none)."""
+        tags = self.audio.tags
+        frame = tags.get("TCON") if tags is not None else None
+        return ", ".join(frame.text) if frame is not None else ""
+
+    @property
+    def genre_models(self):
+        """The TXXX:GENRE_MODELS text as stored (empty if there is none)."""
+        tags = self.audio.tags
+        frame = tags.get(f"TXXX:{MODELS_DESC}") if tags is not None else None
+        return ", ".join(frame.text) if frame is not None else ""
+
+    def write_genre(self, genres, models=None):
+        """
+        Set the genre to the joined genres and, with models (one per genre), record which model
+        produced each as TXXX:GENRE_MODELS, e.g. "rock=MSD_musicnn; jazz=MSD_musicnn+MTT_musicnn".
+        Returns (written, bytes_rewritten, in_place); nothing is written when both already match.
+        """
+        text = ", ".join(genres)
+        models_text = "; ".join(f"{genre}={model}" for genre, model in zip(genres, models)) if models else None
+        if (self.audio.tags is not None and self.genre == text
+                and (models_text is None or self.genre_models == models_text)):
+            return False, 0, True
+        if self.audio.tags is None:
+            self.audio.add_tags()
+        self.audio.tags.setall("TCON", [TCON(encoding=3, text=[text])])
+        if models_text is not None:
+            self.audio.tags.setall(f"TXXX:{MODELS_DESC}", [TXXX(encoding=3, desc=MODELS_DESC, text=[models_text])])
+        return (True,) + self.save()
+
+    def save(self):
+        """Save the tag keeping its padding; returns (bytes_rewritten, in_place)."""
+        return _save_keeping_padding(self.audio, self.path)
+
+class WriteStats:
+    """ID3 write counters for one run."""
+
+    def __init__(self):
+        self.written = 0
+        self.unchanged = 0
+        self.in_place = 0
+        self.grown = 0
+        self.bytes_rewritten = 0
+
+    def add(self, written, bytes_rewritten, in_place):
+        if not written:
+            self.unchanged += 1
+            return
+        self.written += 1
+        self.bytes_rewritten += bytes_rewritten
+        if in_place:
+            self.in_place += 1
+        else:
+            self.grown += 1
+
+    def report(self):
+        return (f"{self.written} genres written ({self.in_place} in place, {self.grown} grown), "
+                f"{self.unchanged} already up to date, {self.bytes_rewritten / (1024 * 1024):.1f} MB rewritten")
+
+# ========================
+# Bulk Field Editor
+# ========================
+
+def update_fields(path, updates):
+    """
+    Set EasyID3 fields ({key: value}) on one MP3. Returns (written, bytes_rewritten, in_place);
+    the file is not touched when every field already has the requested value.
+    """
+    audio = MP3(path, ID3=EasyID3)
+    if audio.tags is None:
+        audio.add_tags()
+    changes = {key: value for key, value in updates.items() if audio.tags.get(key) != [value]}
+    if not changes:
+        return False, 0, True
+    for key, value in changes.items():
+        audio.tags[key] = value
+    return (True,) + _save_keeping_padding(audio, path)
+
+class EditSummary:
+    """Outcome of one bulk edit."""
+
+    def __init__(self, total):
+        self.total = total
+        self.changed = 0
+        self.unchanged = 0
+        self.failures = []  # (filename, message)
+        self.stats = WriteStats()
+        self.cancelled = False
+
+    @property
+    def done(self):
+        return self.changed + self.unchanged + len(self.failures)
+
+    def report(self):
+        text = f"{self.changed} changed, {self.unchanged} already up to date, {len(self.failures)} failed"
+        if self.cancelled:
+            text += f", {self.total - self.done} not reached (cancelled)"
+        return text
+
+def edit_files(folder_path, filenames, updates, workers=EDIT_WORKERS, should_stop=None, on_progress=None):
+    """
+    Apply updates ({EasyID3 key: value}) to filenames (relative to folder_path) on a thread pool,
+    keeping at most 2 * workers files in flight. on_progress(done, total, filename) is called from
+    pool threads; once should_stop() turns true no new files are started. Returns an EditSummary.
+    """
+    should_stop = should_stop or (lambda: False)
+    summary = EditSummary(len(filenames))
+    names = iter(filenames)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metadata-edit") as pool:
+        in_flight = {}
+        while True:
+            while len(in_flight) < 2 * workers and not should_stop():
+                filename = next(names, None)
+                if filename is None:
+                    break
+                in_flight[pool.submit(update_fields, os.path.join(folder_path, filename), updates)] = filename
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                filename = in_flight.pop(future)
+                try:
+                    written, nbytes, in_place = future.result()
+                except Exception as e:
+                    summary.failures.append((filename, str(e)))
+                else:
+                    summary.stats.add(written, nbytes, in_place)
+                    if written:
+                        summary.changed += 1
+                    else:
+                        summary.unchanged += 1
+                if on_progress is not None:
+                    on_progress(summary.done, summary.total, filename)
+    summary.cancelled = summary.done < summary.total
+    return summary
@@ -0,0 +1,101 @@
+"""
+Run journal for Dabbing Genre Tagger.
+
+Every tagging run appends one JSON line per finished file to
+DATA_DIR/run_journal.jsonl: its status and, for tagged files, the tags and
+scores that went to the export. The first line records the run's settings and
+a last {"finished": true} line marks a run that got to the end. After a crash,
+reboot or Stop, "Resume last run" reads the journal back, rebuilds the export
+from it and only tags the files it has no result for.
+"""
+import json
+import os
+import time
+
+JOURNAL_FILENAME = "run_journal.jsonl"
+SYNC_EVERY = 50  # files between fsyncs
+
+# Statuses that count as done on resume; failed files are tried again
+DONE_STATUSES = ("tagged", "skipped")
+
+class LastRun:
+    """What a journal says about its run: settings, the last entry per file (in order) and whether it finished."""
+
+    def __init__(self, settings, entries, finished):
+        self.settings = settings
+        self.entries = entries
+        self.finished = finished
+
+    @property
+    def folder_path(self):
+        return self.settings.get("folder_path")
+
+    @property
+    def done(self):
+        """Relative paths that don't need tagging again."""
+        return {name for name, entry in self.entries.items() if entry["status"] in DONE_STATUSES}
+
+    def tagged(self):
+        """(filename, [(tag, score, model), ...]) for every tagged file, in the order they finished."""
+        for name, entry in self.entries.items():
+            if entry["status"] == "tagged":
+                yield name, [tuple(tag) for tag in entry["tags"]]
+
+def load_last_run(path):
+    """Read a journal; None if there is none or it has no settings line."""
+    if not os.path.exists(path):
+        return None
+    settings = None
+    entries = {}
+    finished = False
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a torn last line after a crash
+            if "settings" in record:
+                settings = record["settings"]
+            elif "file" in record:
+                entries.pop(record["file"], None)  # a retried file moves to where it finished last
+                entries[record["file"]] = record
+            elif record.get("finished"):
+                finished = True
+    if settings is None:
+        return None
+    return LastRun(settings, entries, finished)
+
+class RunJournal:
+    """Append-only journal for one run. resume=True continues the existing file instead of starting over."""
+
+    def __init__(self, path, settings, resume=False):
+        self.path = path
+        self._unsynced = 0
+        if resume:
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+            self._write({"settings": settings, "started": time.time()})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= SYNC_EVERY:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def record(self, filename, status, tags=None):
+        """Log a finished file: "tagged" (with its (tag, score, model) list), "skipped" or "failed"."""
+        record = {"file": filename, "status": status}
+        if tags is not None:
+            record["tags"] = [[tag, round(score, 4), model] for tag, score, model in tags]
+        self._write(record)
+
+    def finish(self):
+        """Mark the run as complete; there is nothing left to resume."""
+        self._write({"finished": True, "ended": time.time()})
+
+    def close(self):
+        os.fsync(self._file.fileno())
+        self._file.close()
@@ -0,0 +1,156 @@
+"""
+Batch Renamer planning for Dabbing Genre Tagger.
+
+Preview builds a RenamePlan once: the folder is scanned, genre tags are read on
+a thread pool, and every source file's mtime and size are recorded. Confirm
+then runs that exact plan instead of re-reading the folder. Before touching
+anything it refuses plans with colliding targets and plans that have gone
+stale. Files are renamed in two phases through temporary names, so a rename
+that swaps or shifts names (01 -> 02, 02 -> 03) never overwrites a file.
+"""
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from mutagen.easyid3 import EasyID3
+from mutagen.mp3 import MP3
+
+RENAME_MODES = ("Use prefix", "Use genre tag")
+READ_WORKERS = 8
+TEMP_SUFFIX = ".renaming"
+
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+class RollbackError(RuntimeError):
+    """A rename failed and some files could not be put back; stranded lists (where it is, where it was)."""
+
+    def __init__(self, error, stranded):
+        super().__init__(f"{error} ({len(stranded)} file(s) could not be put back)")
+        self.stranded = stranded
+
+def top_genre(path):
+    """The first genre in the file's ID3 genre field, or "unknown"."""
+    try:
+        audio = MP3(path, ID3=EasyID3)
+        genre = audio.get("genre", ["unknown"])[0].split(",")[0].strip()
+    except Exception:
+        return "unknown"
+    return _UNSAFE_CHARS.sub("_", genre) or "unknown"
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+class RenamePlan:
+    """
+    The renames a preview showed: (old, new) paths relative to folder_path, in scan order.
+    collisions lists human-readable problems that make the plan unsafe to run.
+    """
+
+    def __init__(self, folder_path, mode, prefix):
+        self.folder_path = folder_path
+        self.mode = mode
+        self.prefix = prefix
+        self.renames = []
+        self.collisions = []
+        self._stamps = {}      # old relative path -> (mtime_ns, size) at preview time
+        self._dir_stamps = {}  # relative folder -> mtime_ns, catches files added or removed since
+
+    def matches(self, folder_path, mode, prefix):
+        """True if the plan was built for these settings."""
+        return (self.folder_path, self.mode, self.prefix) == (folder_path, mode, prefix)
+
+    @property
+    def changes(self):
+        """The renames that actually change a name."""
+        return [(old, new) for old, new in self.renames if old != new]
+
+    def stale_reason(self):
+        """Why the plan no longer matches the disk, or None if it is still current."""
+        for rel_dir, mtime_ns in self._dir_stamps.items():
+            try:
+                if os.stat(os.path.join(self.folder_path, rel_dir)).st_mtime_ns != mtime_ns:
+                    return f"{rel_dir or self.folder_path} changed since the preview"
+            except OSError:
+                return f"{rel_dir or self.folder_path} is gone"
+        for old, stamp in self._stamps.items():
+            try:
+                if _stamp(os.path.join(self.folder_path, old)) != stamp:
+                    return f"{old} changed since the preview"
+            except OSError:
+                return f"{old} is gone"
+        return None
+
+def build_plan(folder_path, filenames, mode, prefix, workers=READ_WORKERS):
+    """Plan renames for filenames (relative to folder_path), numbering them in order."""
+    plan = RenamePlan(folder_path, mode, prefix)
+    paths = [os.path.join(folder_path, name) for name in filenames]
+    if mode == "Use prefix":
+        stems = [prefix] * len(paths)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rename-read") as pool:
+            stems = list(pool.map(top_genre, paths))
+
+    for i, (name, path, stem) in enumerate(zip(filenames, paths, stems), start=1):
+        new = os.path.join(os.path.dirname(name), f"{stem}{i:02}.mp3")  # stays in its own subfolder
+        plan.renames.append((name, new))
+        plan._stamps[name] = _stamp(path)
+    for rel_dir in {os.path.dirname(name) for name in filenames}:
+        plan._dir_stamps[rel_dir] = os.stat(os.path.join(folder_path, rel_dir)).st_mtime_ns
+
+    # Two sources aiming at one name, or a target taken by a file that is not being renamed away
+    sources = {os.path.normcase(old) for old, new in plan.renames}
+    claimed = {}
+    for old, new in plan.changes:
+        key = os.path.normcase(new)
+        if key in claimed:
+            plan.collisions.append(f"{old} and {claimed[key]} would both become {new}")
+        else:
+            claimed[key] = old
+        if key not in sources and os.path.lexists(os.path.join(folder_path, new)):
+            plan.collisions.append(f"{old} → {new}: a file with that name already exists")
+    return plan
+
+def execute_plan(plan):
+    """
+    Run a checked plan: every source is first moved to a unique temporary name, then to its
+    target. If anything fails the files moved so far are put back. Returns the number renamed.
+    Raises RollbackError, naming the files left half-renamed, if putting them back fails too.
+    """
+    if plan.collisions:
+        raise ValueError(plan.collisions[0])
+    reason = plan.stale_reason()
+    if reason is not None:
+        raise RuntimeError(f"The preview is out of date ({reason}); preview again")
+
+    token = uuid.uuid4().hex[:8]
+    steps = [(os.path.join(plan.folder_path, old),
+              os.path.join(plan.folder_path, f"{old}.{token}{TEMP_SUFFIX}"),
+              os.path.join(plan.folder_path, new)) for old, new in plan.changes]
+    done = []  # (from, to) renames already made, undone in reverse on failure
+    try:
+        for old_path, temp_path, _ in steps:
+            os.rename(old_path, temp_path)
+            done.append((old_path, temp_path))
+        for _, temp_path, new_path in steps:
+            if os.path.lexists(new_path):
+                raise FileExistsError(f"{new_path} appeared during the rename")
+            os.rename(temp_path, new_path)
+            done.append((temp_path, new_path))
+    except Exception as e:
+        stuck = {}     # temporary name -> where the file stayed when it couldn't go back to it
+        stranded = []  # (where the file is, where it was) relative to the folder
+        for src, dst in reversed(done):
+            dst = stuck.pop(dst, dst)
+            try:
+                os.rename(dst, src)
+            except OSError:
+                if src.endswith(TEMP_SUFFIX):
+                    stuck[src] = dst  # its first rename is undone from where it is now
+                else:
+                    stranded.append((os.path.relpath(dst, plan.folder_path), os.path.relpath(src, plan.folder_path)))
+        if stranded:
+            raise RollbackError(e, stranded) from e
+        raise
+    return len(steps)
@@ -0,0 +1,75 @@
+"""
+Library scanning for Dabbing Genre Tagger.
+
+One os.scandir-based walker shared by the tagger, Song Browser, Metadata Editor
+and Batch Renamer. It yields matching files lazily (so work starts on the first
+file instead of after the whole listing), can recurse through artist/album trees
+with a depth limit, filters with include/exclude patterns, and keeps a running
+count that the GUI can show while a big network share is still being walked.
+"""
+import fnmatch
+import os
+
+DEFAULT_INCLUDE = ("*.mp3",)
+
+def split_patterns(text):
+    """Patterns from a comma or semicolon separated string, as kept in tagger_config.ini."""
+    return tuple(p.strip() for p in text.replace(";", ",").split(",") if p.strip())
+
+class LibraryScanner:
+    """
+    Walk folder_path and yield the paths of matching files relative to it, in scan order.
+
+    include / exclude are fnmatch patterns checked case-insensitively against both the file name
+    and the relative path (with "/" separators); a directory that matches an exclude pattern is
+    not entered. max_depth counts subfolder levels below folder_path (0 = only folder_path itself,
+    None = no limit). count is the number of files yielded so far and done turns true once the
+    walk has finished.
+    """
+
+    def __init__(self, folder_path, recursive=True, include=DEFAULT_INCLUDE, exclude=(), max_depth=None):
+        self.folder_path = folder_path
+        self.max_depth = max_depth if recursive else 0
+        self.include = tuple(p.lower() for p in include) or DEFAULT_INCLUDE
+        self.exclude = tuple(p.lower() for p in exclude)
+        self.count = 0
+        self.done = False
+        self.errors = []  # (folder, message) for folders that could not be read
+
+    def _matches(self, patterns, name, relpath):
+        name, relpath = name.lower(), relpath.lower()
+        return any(fnmatch.fnmatchcase(name, p) or fnmatch.fnmatchcase(relpath, p) for p in patterns)
+
+    def __iter__(self):
+        self.count = 0
+        self.done = False
+        pending = [("", 0)]  # (relative folder, depth), subfolders walked depth-first in name order
+        while pending:
+            rel_dir, depth = pending.pop()
+            subdirs = []
+            try:
+                # Files come out in the order the OS lists them, so the first one doesn't wait for the rest
+                with os.scandir(os.path.join(self.folder_path, rel_dir)) as it:
+                    for entry in it:
+                        relpath = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        if self.exclude and self._matches(self.exclude, entry.name, relpath):
+                            continue
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if is_dir:
+                            if self.max_depth is None or depth < self.max_depth:
+                                subdirs.append((relpath, depth + 1))
+                        elif self._matches(self.include, entry.name, relpath):
+                            self.count += 1
+                            yield relpath.replace("/", os.sep)
+            except OSError as e:
+                self.errors.append((rel_dir or self.folder_path, str(e)))
+            subdirs.sort(key=lambda subdir: subdir[0].lower())
+            pending.extend(reversed(subdirs))
+        self.done = True
+
+def scan(folder_path, **options):
+    """Shortcut for iterating a LibraryScanner."""
+    return iter(LibraryScanner(folder_path, **options))
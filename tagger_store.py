@@ -0,0 +1,287 @@
+"""
+Full tag-score store for Dabbing Genre Tagger.
+
+Every tagged track's complete mean score vector (all 50 tags, not just the top
+10 that reach Excel or ID3) goes into a memory-mapped .npy matrix, one row per
+track, with an append-only JSONL index mapping file paths to rows. Per-window
+taggrams can be kept the same way. Re-deriving top-k tags or thresholds for a
+whole library is then a NumPy operation over the matrix, no model needed, and
+the same rows double as track embeddings for "similar tracks" lookups.
+
+    python tagger_store.py --top 3 --threshold 0.2 > retagged.csv
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+STORE_DIRNAME = "score_store"
+INITIAL_ROWS = 1024
+FLUSH_EVERY = 200  # puts between memmap flushes
+
+class _GrowingMatrix:
+    """An .npy memmap of shape (capacity, width) that doubles its capacity when it fills up."""
+
+    def __init__(self, path, width, dtype):
+        self.path = path
+        if os.path.exists(path):
+            self.data = np.load(path, mmap_mode="r+")
+        else:
+            self.data = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(INITIAL_ROWS, width))
+
+    def ensure(self, rows):
+        """Make room for at least rows rows."""
+        capacity = len(self.data)
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        tmp_path = self.path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=self.data.dtype,
+                                          shape=(capacity, self.data.shape[1]))
+        for start in range(0, len(self.data), 65536):
+            grown[start:start + 65536] = self.data[start:start + 65536]
+        grown.flush()
+        del grown
+        self.data.flush()
+        self.data = None  # Windows can't replace a file this process still maps
+        try:
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # Someone else still maps it (e.g. the Song Browser): keep the old matrix usable
+            self.data = np.load(self.path, mmap_mode="r+")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.data = np.load(self.path, mmap_mode="r+")
+
+    def flush(self):
+        self.data.flush()
+
+class ScoreStore:
+    """
+    Mean score vectors (float16 by default) per track for one model, under folder/<model>/.
+    Re-tagging a path overwrites its row; the last index line for a path wins.
+    """
+
+    def __init__(self, folder, model, labels, dtype=np.float16, keep_taggrams=False):
+        self.folder = os.path.join(folder, model)
+        os.makedirs(self.folder, exist_ok=True)
+        self.model = model
+        self.labels = list(labels)
+        self.keep_taggrams = keep_taggrams
+        self._lock = threading.Lock()
+        self._unflushed = 0
+
+        labels_path = os.path.join(self.folder, "labels.json")
+        if os.path.exists(labels_path):
+            with open(labels_path, "r", encoding="utf-8") as f:
+                if json.load(f) != self.labels:
+                    raise ValueError(f"Score store {self.folder} was written with different labels")
+        else:
+            with open(labels_path, "w", encoding="utf-8") as f:
+                json.dump(self.labels, f)
+
+        self.rows = {}      # path -> index entry {"row", "windows", "variant", ["taggram": [start, count]]}
+        self.count = 0
+        self.window_rows = 0
+        self._index_path = os.path.join(self.folder, "index.jsonl")
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a torn last line after a crash
+                    self.rows[entry["path"]] = entry
+                    self.count = max(self.count, entry["row"] + 1)
+                    if "taggram" in entry:
+                        self.window_rows = max(self.window_rows, sum(entry["taggram"]))
+        self.scores = _GrowingMatrix(os.path.join(self.folder, "scores.npy"), len(self.labels), dtype)
+        self.windows = None
+        if keep_taggrams or os.path.exists(os.path.join(self.folder, "windows.npy")):
+            self.windows = _GrowingMatrix(os.path.join(self.folder, "windows.npy"), len(self.labels), dtype)
+        self._index = open(self._index_path, "a", encoding="utf-8")
+
+    def put(self, path, scores, num_windows=None, taggram=None, variant=""):
+        """Store a track's mean scores (and its per-window taggram, if kept)."""
+        path = os.path.abspath(path)
+        with self._lock:
+            entry = self.rows.get(path)
+            row = entry["row"] if entry is not None else self.count
+            self.scores.ensure(row + 1)
+            self.scores.data[row] = scores
+            entry = {"path": path, "row": row, "windows": num_windows, "variant": variant}
+            if self.keep_taggrams and taggram is not None:
+                # Taggrams are append-only; a re-tagged track's old windows are simply no longer indexed
+                start = self.window_rows
+                self.windows.ensure(start + len(taggram))
+                self.windows.data[start:start + len(taggram)] = taggram
+                self.window_rows += len(taggram)
+                entry["taggram"] = [start, len(taggram)]
+            self.rows[path] = entry
+            self.count = max(self.count, row + 1)
+            self._index.write(json.dumps(entry) + "\n")
+            self._index.flush()  # readers such as SimilarityIndex follow the index as it grows
+            self._unflushed += 1
+            if self._unflushed >= FLUSH_EVERY:
+                self._flush()
+
+    def get(self, path):
+        """Mean scores for path, or None if it was never stored."""
+        entry = self.rows.get(os.path.abspath(path))
+        return None if entry is None else np.asarray(self.scores.data[entry["row"]], dtype=np.float32)
+
+    def taggram(self, path):
+        """Per-window scores for path, or None if they were not kept."""
+        entry = self.rows.get(os.path.abspath(path))
+        if entry is None or "taggram" not in entry or self.windows is None:
+            return None
+        start, count = entry["taggram"]
+        return np.asarray(self.windows.data[start:start + count], dtype=np.float32)
+
+    def matrix(self):
+        """(paths, scores) for every stored track, scores in row order as one (tracks, tags) array."""
+        entries = sorted(self.rows.values(), key=lambda entry: entry["row"])
+        rows = np.array([entry["row"] for entry in entries], dtype=np.int64)
+        return [entry["path"] for entry in entries], self.scores.data[:self.count][rows]
+
+    def top_k(self, k=3, threshold=None):
+        """
+        Yield (path, [(tag, score), ...]) with each track's k best tags, best first,
+        optionally dropping tags scoring below threshold. Vectorized over the whole matrix.
+        """
+        paths, scores = self.matrix()
+        if not paths:
+            return
+        scores = np.asarray(scores, dtype=np.float32)
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for path, indices, values in zip(paths, top, top_scores):
+            yield path, [(self.labels[i], float(v)) for i, v in zip(indices, values)
+                         if threshold is None or v >= threshold]
+
+    def _flush(self):
+        self.scores.flush()
+        if self.windows is not None:
+            self.windows.flush()
+        self._index.flush()
+        self._unflushed = 0
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._index.close()
+
+class SimilarityIndex:
+    """
+    Cosine similarity top-k over a score store's rows, read-only alongside the tagger writing it.
+    Each track's mean tag vector is its embedding; refresh() picks up tracks tagged since the last
+    call by reading only the new index lines, so the index grows with the store.
+    """
+
+    CHUNK = 65536  # rows per matrix product
+
+    def __init__(self, folder, model):
+        self.folder = os.path.join(folder, model)
+        self.paths = []
+        self._positions = {}  # path -> position in paths
+        self._rows = np.empty(0, dtype=np.int64)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._data = None
+        self._data_stat = None
+        self._index_offset = 0
+        self.refresh()
+
+    def refresh(self):
+        """Pick up newly stored or re-tagged tracks."""
+        index_path = os.path.join(self.folder, "index.jsonl")
+        scores_path = os.path.join(self.folder, "scores.npy")
+        if not os.path.exists(index_path) or not os.path.exists(scores_path):
+            return
+        with open(index_path, "rb") as f:
+            f.seek(self._index_offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1  # leave a half-written last line for next time
+        self._index_offset += end
+        changed = {}
+        for line in chunk[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            changed[entry["path"]] = entry["row"]
+        stat = os.stat(scores_path)
+        if (stat.st_ino, stat.st_size) != self._data_stat:
+            # The tagger grows scores.npy by writing a new file, so map it again
+            self._data = np.load(scores_path, mmap_mode="r")
+            self._data_stat = (stat.st_ino, stat.st_size)
+        if not changed:
+            return
+        new_paths = [path for path in changed if path not in self._positions]
+        for path in new_paths:
+            self._positions[path] = len(self.paths)
+            self.paths.append(path)
+        self._rows = np.concatenate([self._rows, np.zeros(len(new_paths), dtype=np.int64)])
+        self._norms = np.concatenate([self._norms, np.zeros(len(new_paths), dtype=np.float32)])
+        positions = np.array([self._positions[path] for path in changed], dtype=np.int64)
+        self._rows[positions] = list(changed.values())
+        vectors = np.asarray(self._data[self._rows[positions]], dtype=np.float32)
+        self._norms[positions] = np.linalg.norm(vectors, axis=1)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._positions
+
+    def similar(self, path, k=10):
+        """The k stored tracks most similar to path as [(path, cosine similarity)], best first."""
+        position = self._positions.get(os.path.abspath(path))
+        if position is None:
+            return []
+        query = np.asarray(self._data[self._rows[position]], dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        sims = np.empty(len(self.paths), dtype=np.float32)
+        for start in range(0, len(self.paths), self.CHUNK):
+            rows = self._rows[start:start + self.CHUNK]
+            sims[start:start + len(rows)] = np.asarray(self._data[rows], dtype=np.float32) @ query
+        sims /= np.maximum(self._norms, 1e-12)
+        sims[position] = -np.inf
+        k = min(k, len(sims) - 1)
+        if k <= 0:
+            return []
+        best = np.argpartition(-sims, k - 1)[:k]
+        best = best[np.argsort(-sims[best])]
+        return [(self.paths[i], float(sims[i])) for i in best]
+
+def main(argv=None):
+    import argparse
+    import csv
+    import sys
+
+    from tagger_core import RESULTS_DIR
+    from tagger_engine import DEFAULT_MODEL, model_labels
+
+    parser = argparse.ArgumentParser(description="Re-derive tags from the stored score matrix, no model needed.")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--top", type=int, default=3, help="tags per track")
+    parser.add_argument("--threshold", type=float, help="drop tags scoring below this")
+    args = parser.parse_args(argv)
+
+    store = ScoreStore(os.path.join(RESULTS_DIR, STORE_DIRNAME), args.model, model_labels(args.model))
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["Filename", "Tag", "Score"])
+    for path, tags in store.top_k(args.top, args.threshold):
+        writer.writerows([path, tag, round(score, 4)] for tag, score in tags)
+    store.close()
+
+if __name__ == "__main__":
+    main()
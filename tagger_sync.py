@@ -0,0 +1,76 @@
+"""
+Incremental library sync for Dabbing Genre Tagger.
+
+A manifest remembers the size, mtime and tagging settings of every file as of
+its last successful run, so later runs (and the folder watcher) only tag files
+that are new or changed.
+"""
+import json
+import os
+import time
+
+MANIFEST_FILENAME = "library_manifest.json"
+SAVE_EVERY = 200  # tracks recorded between manifest saves
+
+def settings_key(model, input_length, input_overlap, writes_genre, variant=""):
+    """Everything about a run that would change what ends up in a file's tags."""
+    key = f"{model}|{float(input_length):g}|{float(input_overlap or 0):g}|{'genre' if writes_genre else 'scores'}"
+    return f"{key}|{variant}" if variant else key
+
+class LibraryManifest:
+    """(size, mtime, settings) per file path as of the last time it was tagged."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._unsaved = 0
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}  # unreadable manifest: everything counts as new
+
+    @staticmethod
+    def _entry(stat, settings):
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "settings": settings}
+
+    def is_current(self, filepath, settings, stat=None):
+        """True if the file is unchanged since it was last tagged with these settings."""
+        entry = self.entries.get(os.path.abspath(filepath))
+        if entry is None:
+            return False
+        stat = stat or os.stat(filepath)
+        return entry == self._entry(stat, settings)
+
+    def record(self, filepath, settings):
+        """Mark a file as tagged; call after our own ID3 write so its new mtime is what counts."""
+        self.entries[os.path.abspath(filepath)] = self._entry(os.stat(filepath), settings)
+        self._unsaved += 1
+        if self._unsaved >= SAVE_EVERY:
+            self.save()
+
+    def save(self):
+        if not self._unsaved:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+def iter_changed(folder_path, filenames, manifest, settings, settle_seconds=0):
+    """
+    Yield (filename, is_current) as filenames stream in, e.g. straight from a LibraryScanner.
+    Files modified less than settle_seconds ago are left out entirely; they may still be copying in.
+    """
+    now = time.time()
+    for filename in filenames:
+        filepath = os.path.join(folder_path, filename)
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            continue
+        if settle_seconds and now - stat.st_mtime < settle_seconds:
+            continue
+        yield filename, manifest.is_current(filepath, settings, stat)
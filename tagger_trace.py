@@ -0,0 +1,132 @@
+"""
+Run tracing for Dabbing Genre Tagger.
+
+process_files() records a span for every stage a file passes through (open,
+decode, inference, aggregate, id3, export) in LOGS_DIR/trace_<time>.jsonl, one
+JSON object per line as it happens. Optionally the same spans go to a Chrome
+trace-event file that chrome://tracing or https://ui.perfetto.dev can open.
+At the end of a run the per-stage p50/p95/p99 and the slowest files are logged
+and saved next to the trace, so a slow overnight batch can be explained after
+the fact without a profiler.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+STAGES = ("open", "decode", "inference", "aggregate", "id3", "export")
+SLOWEST_FILES = 10
+PERCENTILES = (50, 95, 99)
+
+class Tracer:
+    """Collects spans for one run and streams them to disk; safe to call from any thread."""
+
+    def __init__(self, logs_dir, chrome=False):
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        self.path = os.path.join(logs_dir, f"trace_{stamp}.jsonl")
+        self.summary_path = os.path.join(logs_dir, f"trace_{stamp}_summary.json")
+        self.chrome_path = os.path.join(logs_dir, f"trace_{stamp}.chrome.json") if chrome else None
+        self._lock = threading.Lock()
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._chrome = None
+        self._origin = time.time()
+        self._durations = {}  # stage -> [seconds]
+        self._per_file = {}   # file -> {stage: seconds}
+        self._pid = os.getpid()
+        if chrome:
+            # The JSON array format lets the closing bracket be missing, so a crashed run stays readable
+            self._chrome = open(self.chrome_path, "w", encoding="utf-8")
+            self._chrome.write("[\n")
+            for tid, name in enumerate(STAGES, start=1):  # one lane per stage
+                self._chrome.write(json.dumps({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                                               "args": {"name": name}}) + ",\n")
+
+    def add(self, stage, start, seconds, file=None, **attrs):
+        """Record a span that was timed elsewhere: start is a time.time() value, seconds its length."""
+        span = {"stage": stage, "file": file, "start": round(start, 6), "seconds": round(seconds, 6)}
+        span.update(attrs)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(span, ensure_ascii=False) + "\n")
+            self._file.flush()  # a crashed run keeps its spans
+            self._durations.setdefault(stage, []).append(seconds)
+            if file is not None:
+                stages = self._per_file.setdefault(file, {})
+                stages[stage] = stages.get(stage, 0.0) + seconds
+            if self._chrome is not None:
+                self._chrome.write(json.dumps({
+                    "name": stage, "cat": "tagging", "ph": "X", "pid": self._pid,
+                    "tid": STAGES.index(stage) + 1 if stage in STAGES else len(STAGES) + 1,
+                    "ts": int((start - self._origin) * 1e6), "dur": max(int(seconds * 1e6), 1),
+                    "args": dict(attrs, file=file)}, ensure_ascii=False) + ",\n")
+
+    def span(self, stage, file=None, **attrs):
+        """Context manager timing the code inside it as one span."""
+        return _Span(self, stage, file, attrs)
+
+    def summary(self):
+        """{"stages": {stage: {count, total, p50, p95, p99, max}}, "slowest": [{file, seconds, stages}]}"""
+        with self._lock:
+            stages = {}
+            for stage, durations in self._durations.items():
+                values = np.asarray(durations, dtype=np.float64)
+                stats = {"count": len(values), "total": round(float(values.sum()), 4),
+                         "max": round(float(values.max()), 4)}
+                for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                    stats[f"p{p}"] = round(float(value), 4)
+                stages[stage] = stats
+            slowest = heapq.nlargest(SLOWEST_FILES, self._per_file.items(), key=lambda item: sum(item[1].values()))
+        return {"stages": {stage: stages[stage] for stage in sorted(stages, key=_stage_order)},
+                "slowest": [{"file": file, "seconds": round(sum(parts.values()), 4),
+                             "stages": {stage: round(seconds, 4) for stage, seconds in parts.items()}}
+                            for file, parts in slowest]}
+
+    def report(self):
+        """Console lines for the run summary."""
+        summary = self.summary()
+        lines = [f"{stage}: p50 {s['p50']:.2f}s · p95 {s['p95']:.2f}s · p99 {s['p99']:.2f}s · max {s['max']:.2f}s "
+                 f"({s['count']} spans, {s['total']:.1f}s total)" for stage, s in summary["stages"].items()]
+        for entry in summary["slowest"][:3]:
+            worst = max(entry["stages"], key=entry["stages"].get)
+            lines.append(f"slow file: {entry['file']} – {entry['seconds']:.2f}s, mostly {worst}")
+        return lines
+
+    def close(self):
+        """Write the summary file and close the trace files."""
+        summary = self.summary()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+            if self._chrome is not None:
+                self._chrome.write(json.dumps({"name": "run end", "ph": "i", "s": "g", "pid": self._pid, "tid": 1,
+                                               "ts": int((time.time() - self._origin) * 1e6)}) + "\n]\n")
+                self._chrome.close()
+                self._chrome = None
+        with open(self.summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+def _stage_order(stage):
+    return STAGES.index(stage) if stage in STAGES else len(STAGES)
+
+class _Span:
+    def __init__(self, tracer, stage, file, attrs):
+        self.tracer = tracer
+        self.stage = stage
+        self.file = file
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = str(exc)
+        self.tracer.add(self.stage, self.start, time.time() - self.start, self.file, **self.attrs)
+        return False